@@ -0,0 +1,48 @@
+from hashlib import sha256
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+
+TOKEN_CACHE_KEY = 'auth_token:{}'
+
+
+def get_token_cache_key(key):
+    """Ключ кеша токена; сам токен в ключе не хранится."""
+    return TOKEN_CACHE_KEY.format(sha256(key.encode()).hexdigest())
+
+
+def forget_tokens(keys):
+    """Удаление токенов из кеша аутентификации."""
+    cache.delete_many([get_token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Аутентификация по токену с кешированием токена и его пользователя
+    в общем кеше на TOKEN_CACHE_TIMEOUT секунд. Кеш сбрасывается при
+    удалении токена и изменении или удалении пользователя.
+
+    Пользователь из кеша может быть устаревшим: его нельзя сохранять
+    целиком, только с update_fields. Кеш общий для всех процессов только
+    с общим бэкендом кеша: с LocMemCache выход и блокировка пользователя
+    сбрасывают кеш лишь в текущем процессе, поэтому при нескольких
+    воркерах он запрещён в настройках.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = get_token_cache_key(key)
+        token = cache.get(cache_key)
+        if token is not None:
+            if not token.user.is_active:
+                cache.delete(cache_key)
+                raise AuthenticationFailed(
+                    _('User inactive or deleted.')
+                )
+            return token.user, token
+        user, token = super().authenticate_credentials(key)
+        cache.set(cache_key, token, settings.TOKEN_CACHE_TIMEOUT)
+        return user, token
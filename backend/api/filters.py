@@ -1,6 +1,9 @@
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
 
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.models import (FavoriteRecipe, Ingredient, Recipe, ShoppingCart,
+                            Tag, TagToRecipe)
+from recipes.search import search_recipes
 from users.models import CustomUser
 
 
@@ -18,13 +21,16 @@ class IngredientFilter(FilterSet):
 
 class RecipeFilter(FilterSet):
     """
-    Фильтр для поиска рецептов по тегам
-    и полям is_favorited и is_in_shopping_cart.
+    Фильтр для поиска рецептов по тегам, полям is_favorited
+    и is_in_shopping_cart и полнотекстового поиска (параметр search).
+    Условия по связанным таблицам задаются подзапросами EXISTS,
+    поэтому рецепты в выдаче не дублируются.
     """
     tags = filters.ModelMultipleChoiceFilter(
         field_name='tags__slug',
         to_field_name='slug',
         queryset=Tag.objects.all(),
+        method='get_tags'
     )
     author = filters.ModelChoiceFilter(
         queryset=CustomUser.objects.all()
@@ -35,16 +41,37 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    search = filters.CharFilter(
+        method='get_search'
+    )
 
     class Meta:
         model = Recipe
         fields = ('tags', 'author')
 
+    def get_tags(self, queryset, name, tags):
+        """Фильтрация очереди рецептов по slug тегов."""
+        if not tags:
+            return queryset
+        return queryset.filter(
+            Exists(
+                TagToRecipe.objects.filter(
+                    recipe=OuterRef('pk'),
+                    tag__in=tags
+                )
+            )
+        )
+
     def get_is_favorited(self, queryset, name, value):
         """Фильтрация очереди рецептов по полю is_favorited."""
         if self.request.user.is_authenticated and value:
             return queryset.filter(
-                favorite_recipe__user=self.request.user
+                Exists(
+                    FavoriteRecipe.objects.filter(
+                        user=self.request.user,
+                        recipe=OuterRef('pk')
+                    )
+                )
             )
         return queryset
 
@@ -52,6 +79,15 @@ class RecipeFilter(FilterSet):
         """Фильтрация очереди рецептов по полю is_in_shopping_cart."""
         if self.request.user.is_authenticated and value:
             return queryset.filter(
-                recipe_on_shopping_cart__user=self.request.user
+                Exists(
+                    ShoppingCart.objects.filter(
+                        user=self.request.user,
+                        recipe=OuterRef('pk')
+                    )
+                )
             )
         return queryset
+
+    def get_search(self, queryset, name, value):
+        """Полнотекстовый поиск рецептов по названию и описанию."""
+        return search_recipes(queryset, value)
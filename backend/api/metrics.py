@@ -0,0 +1,170 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from time import perf_counter
+from uuid import uuid4
+
+from django.core.cache import cache
+
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERIES_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+WORKERS_KEY = 'metrics_workers'
+WORKER_KEY = 'metrics_worker:{}'
+PUBLISH_INTERVAL = 1
+SNAPSHOT_TIMEOUT = 24 * 60 * 60
+METRICS = {
+    'request_duration_seconds': (
+        'Время обработки запроса.', DURATION_BUCKETS
+    ),
+    'view_duration_seconds': (
+        'Время работы view до рендеринга ответа.', DURATION_BUCKETS
+    ),
+    'render_duration_seconds': (
+        'Время рендеринга ответа.', DURATION_BUCKETS
+    ),
+    'db_duration_seconds': (
+        'Время выполнения SQL-запросов.', DURATION_BUCKETS
+    ),
+    'db_queries': (
+        'Количество SQL-запросов.', QUERIES_BUCKETS
+    ),
+}
+
+
+class QueryCounter:
+    """Обёртка для connection.execute_wrapper, считающая SQL-запросы."""
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += perf_counter() - start
+
+
+class Histogram:
+    """Гистограмма значений в формате Prometheus."""
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self):
+        return list(self.counts), self.sum, self.count
+
+    def merge(self, snapshot):
+        counts, total, count = snapshot
+        self.counts = [a + b for a, b in zip(self.counts, counts)]
+        self.sum += total
+        self.count += count
+
+    def lines(self, name, route):
+        cumulative = 0
+        for bucket, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield (
+                f'{name}_bucket{{route="{route}",le="{bucket}"}} '
+                f'{cumulative}'
+            )
+        yield f'{name}_sum{{route="{route}"}} {self.sum}'
+        yield f'{name}_count{{route="{route}"}} {self.count}'
+
+
+class MetricsRegistry:
+    """
+    Хранилище гистограмм по маршрутам API. Гистограммы копятся в памяти
+    процесса, а их снимок не чаще раза в PUBLISH_INTERVAL секунд
+    записывается в общий кеш: при нескольких воркерах gunicorn выгрузка
+    метрик суммирует снимки всех воркеров, и счётчики не убывают от того,
+    какой воркер ответил на запрос Prometheus.
+    """
+    prefix = 'foodgram_'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = defaultdict(dict)
+        self._key = WORKER_KEY.format(uuid4().hex)
+        self._published = None
+
+    def observe(self, route, **values):
+        with self._lock:
+            for metric, value in values.items():
+                histograms = self._histograms[metric]
+                if route not in histograms:
+                    histograms[route] = Histogram(METRICS[metric][1])
+                histograms[route].observe(value)
+        if (
+            self._published is None
+            or perf_counter() - self._published >= PUBLISH_INTERVAL
+        ):
+            self.publish()
+
+    def publish(self):
+        '''
+        Запись снимка гистограмм процесса в общий кеш и регистрация
+        его ключа в списке воркеров, если ключа там нет, например после
+        гонки при одновременном запуске воркеров.
+        '''
+        self._published = perf_counter()
+        with self._lock:
+            snapshot = {
+                metric: {
+                    route: histogram.snapshot()
+                    for route, histogram in histograms.items()
+                }
+                for metric, histograms in self._histograms.items()
+            }
+        cache.set(self._key, snapshot, timeout=SNAPSHOT_TIMEOUT)
+        workers = cache.get(WORKERS_KEY, set())
+        if self._key not in workers:
+            cache.set(WORKERS_KEY, workers | {self._key}, timeout=None)
+
+    def collect(self):
+        '''
+        Сумма снимков гистограмм всех воркеров из общего кеша. Ключи
+        истёкших снимков удаляются из списка воркеров.
+        '''
+        self.publish()
+        workers = cache.get(WORKERS_KEY, set())
+        snapshots = cache.get_many(workers)
+        if workers - snapshots.keys():
+            cache.set(WORKERS_KEY, set(snapshots), timeout=None)
+        histograms = defaultdict(dict)
+        for snapshot in snapshots.values():
+            for metric, routes in snapshot.items():
+                for route, values in routes.items():
+                    if route not in histograms[metric]:
+                        histograms[metric][route] = Histogram(
+                            METRICS[metric][1]
+                        )
+                    histograms[metric][route].merge(values)
+        return histograms
+
+    def render(self):
+        '''Вывод метрик всех воркеров в текстовом формате Prometheus.'''
+        histograms = self.collect()
+        lines = []
+        for metric, (description, _) in METRICS.items():
+            name = self.prefix + metric
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} histogram')
+            for route, histogram in sorted(histograms[metric].items()):
+                route = route.replace('\\', '\\\\').replace('"', '\\"')
+                lines.extend(histogram.lines(name, route))
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,113 @@
+from contextlib import ExitStack
+from time import perf_counter
+
+from asgiref.sync import (iscoroutinefunction, markcoroutinefunction,
+                          sync_to_async)
+from django.db import connections
+
+from api.metrics import QueryCounter, registry
+from api.routers import SAFE_METHODS, read_from_replica
+
+
+class SyncAndAsyncMiddleware:
+    """
+    Основа middleware, работающего без переключения потоков как при WSGI,
+    так и при ASGI: в асинхронной цепочке запрос обрабатывает acall.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.acall(request)
+        return self.call(request)
+
+
+def watch_queries(stack, counter):
+    """Подключение счётчика запросов ко всем базам в текущем потоке."""
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(counter))
+
+
+class RequestMetricsMiddleware(SyncAndAsyncMiddleware):
+    """
+    Замер количества и времени SQL-запросов, времени работы view
+    и рендеринга ответа. Результаты записываются в гистограммы
+    по имени маршрута и в заголовок ответа Server-Timing.
+    """
+
+    def call(self, request):
+        counter = QueryCounter()
+        start = perf_counter()
+        with ExitStack() as stack:
+            watch_queries(stack, counter)
+            response = self.get_response(request)
+        return self.finish(request, response, counter, start)
+
+    async def acall(self, request):
+        '''
+        При ASGI запросы ORM выполняются в потоке для синхронного кода
+        со своими подключениями, поэтому счётчик подключается в нём.
+        '''
+        counter = QueryCounter()
+        start = perf_counter()
+        with ExitStack() as stack:
+            await sync_to_async(watch_queries)(stack, counter)
+            response = await self.get_response(request)
+        return self.finish(request, response, counter, start)
+
+    def finish(self, request, response, counter, start):
+        '''Запись метрик запроса и заголовка Server-Timing.'''
+        finish = perf_counter()
+        view_finish = getattr(request, 'view_finished_at', finish)
+        total = finish - start
+        view = view_finish - start
+        render = finish - view_finish
+        if request.resolver_match:
+            registry.observe(
+                request.resolver_match.view_name,
+                request_duration_seconds=total,
+                view_duration_seconds=view,
+                render_duration_seconds=render,
+                db_duration_seconds=counter.duration,
+                db_queries=counter.count,
+            )
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={counter.duration * 1000:.1f};'
+            f'desc="{counter.count} queries"',
+            f'view;dur={view * 1000:.1f}',
+            f'render;dur={render * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ))
+        return response
+
+    def process_template_response(self, request, response):
+        request.view_finished_at = perf_counter()
+        return response
+
+
+class ReplicaRoutingMiddleware(SyncAndAsyncMiddleware):
+    """
+    Разрешение чтения с реплики базы данных на время обработки
+    GET- и HEAD-запросов.
+    """
+
+    def call(self, request):
+        token = read_from_replica.set(request.method in SAFE_METHODS)
+        try:
+            return self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
+
+    async def acall(self, request):
+        token = read_from_replica.set(request.method in SAFE_METHODS)
+        try:
+            return await self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
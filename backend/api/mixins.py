@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from api.routers import read_from_primary
+from api.utils import get_catalogue_cache, is_not_modified
+from recipes.versions import get_version
+
+
+class VersionedCacheMixin:
+    """
+    Кеширование ответов list и retrieve по метке версии данных.
+    Ответы содержат заголовок ETag, а клиент с актуальной версией
+    данных получает ответ 304.
+    """
+    version_key = None
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        '''Получение ответа из кеша или его формирование через handler.'''
+        etag, cache_key = get_catalogue_cache(
+            request, self.version_key, get_version(self.version_key)
+        )
+        headers = {'ETag': etag}
+        if is_not_modified(request, etag):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED,
+                headers=headers
+            )
+        data = cache.get(cache_key)
+        if data is None:
+            with read_from_primary():
+                response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            cache.set(cache_key, data, settings.CATALOGUE_CACHE_TIMEOUT)
+        return Response(data, headers=headers)
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
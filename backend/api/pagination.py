@@ -1,6 +1,201 @@
-from rest_framework.pagination import PageNumberPagination
+from functools import cached_property, partial
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import (EmptyPage, Page, PageNotAnInteger,
+                                   Paginator)
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.settings import api_settings
+
+
+def exact_count(queryset):
+    """Точное количество объектов через COUNT(*)."""
+    return queryset.count()
+
+
+def cached_count(queryset):
+    """
+    Количество объектов, закешированное по тексту SQL-запроса
+    на время PAGINATION_COUNT_CACHE_TIMEOUT.
+    """
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        return 0
+    return cache.get_or_set(
+        f'count:{md5(sql.encode()).hexdigest()}',
+        queryset.count,
+        settings.PAGINATION_COUNT_CACHE_TIMEOUT
+    )
+
+
+def estimated_count(queryset):
+    """
+    Оценка количества объектов по статистике PostgreSQL (reltuples)
+    для запросов без фильтров. В остальных случаях используется
+    закешированный подсчёт.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql' or queryset.query.has_filters():
+        return cached_count(queryset)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class '
+            'WHERE oid = to_regclass(%s)',
+            (queryset.model._meta.db_table,)
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return cached_count(queryset)
+    return row[0]
+
+
+COUNT_STRATEGIES = {
+    'exact': exact_count,
+    'cached': cached_count,
+    'estimated': estimated_count,
+}
+
+
+class CountPage(Page):
+    """Страница, наличие следующей страницы для которой известно заранее."""
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class CountPaginator(Paginator):
+    """
+    Пагинатор с заданной функцией подсчёта количества объектов.
+    Подсчёт используется только для поля count ответа: страница
+    запрашивается с одной лишней строкой, по которой определяется
+    наличие следующей страницы, поэтому приблизительный или устаревший
+    подсчёт не влияет на доступность страниц.
+    """
+    def __init__(self, object_list, per_page, count_function, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_function = count_function
+
+    @cached_property
+    def count(self):
+        return self.count_function(self.object_list)
+
+    def validate_number(self, number):
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_('That page number is not an integer'))
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not rows and (number > 1 or not self.allow_empty_first_page):
+            raise EmptyPage(_('That page contains no results'))
+        known = bottom + len(rows) + has_next
+        if self.count < known:
+            self.count = known
+        return CountPage(rows, number, self, has_next)
 
 
 class PageLimitPagination(PageNumberPagination):
-    """Пагинация требуемого количества страниц в зависимости от запроса."""
+    """
+    Пагинация требуемого количества страниц в зависимости от запроса.
+    Способ подсчёта общего количества объектов задаётся атрибутом
+    вьюсета pagination_count_strategy: exact (по умолчанию), cached
+    или estimated.
+    """
     page_size_query_param = 'limit'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        strategy = getattr(view, 'pagination_count_strategy', 'exact')
+        self.django_paginator_class = partial(
+            CountPaginator, count_function=COUNT_STRATEGIES[strategy]
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+
+class CursorLimitPagination(CursorPagination):
+    """
+    Пагинация по курсору без подсчёта общего количества объектов.
+    Курсор строится по полям created и id. Другие сортировки для курсора
+    не подходят: значения вроде favorites_count не уникальны
+    и меняются между запросами.
+    """
+    ordering = ('created', 'id')
+    orderings = {
+        'created': ('created', 'id'),
+        '-created': ('-created', '-id'),
+    }
+    page_size = settings.CURSOR_PAGE_SIZE
+    page_size_query_param = 'limit'
+
+    def get_ordering(self, request, queryset, view):
+        '''
+        Сортировка из параметра ordering (created или -created), а без
+        него - сортировка курсора по умолчанию.
+        '''
+        ordering = request.query_params.get(api_settings.ORDERING_PARAM)
+        if not ordering:
+            return self.ordering
+        if ordering not in self.orderings:
+            raise ValidationError(
+                {
+                    api_settings.ORDERING_PARAM: _(
+                        'При пагинации по курсору доступна только '
+                        'сортировка created или -created.'
+                    )
+                }
+            )
+        return self.orderings[ordering]
+
+
+class FeedCursorPagination(CursorLimitPagination):
+    """
+    Пагинация ленты подписок по курсору, новые рецепты первыми.
+    Параметр ordering не учитывается.
+    """
+    ordering = ('-created',)
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
+
+
+class PageOrCursorPagination(PageLimitPagination):
+    """
+    Пагинация по номеру страницы или, если в запросе передан
+    параметр cursor (в том числе пустой), по курсору.
+    """
+    cursor_pagination_class = CursorLimitPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if (
+            self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+        ):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+
+REPLICA_ALIAS = 'replica'
+SAFE_METHODS = ('GET', 'HEAD')
+
+read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+@contextmanager
+def read_from_primary():
+    """
+    Чтение из основной базы данных для заполнения кешей по меткам версий:
+    метка меняется сразу после записи, а отстающая реплика вернула бы
+    старые данные, которые попали бы в кеш под новой меткой.
+    """
+    token = read_from_replica.set(False)
+    try:
+        yield
+    finally:
+        read_from_replica.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Маршрутизация запросов к базе данных: чтение во время GET- и
+    HEAD-запросов выполняется на реплике, если она настроена. После
+    первой записи запрос закрепляется за основной базой, чтобы
+    читать собственные изменения. Данные для кешей по меткам версий
+    читаются из основной базы (read_from_primary). Миграции применяются только
+    к основной базе.
+    """
+
+    def db_for_read(self, model, **hints):
+        if read_from_replica.get() and REPLICA_ALIAS in connections:
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        read_from_replica.set(False)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_ALIAS
@@ -1,13 +1,22 @@
 from django.conf import settings
 from django.contrib.auth.password_validation import validate_password
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Prefetch
 from django.utils.translation import gettext_lazy as _
 from djoser.serializers import UserCreateSerializer
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
 from api.fields import Base64ImageField
+from api.routers import read_from_primary
+from api.utils import (batch_changes, change_recipe_in_shopping_lists,
+                       get_recipes_limit)
+from recipes.images import make_renditions
 from recipes.models import (FavoriteRecipe, Ingredient, IngredientToRecipe,
                             Recipe, ShoppingCart, Tag, TagToRecipe)
+from recipes.versions import (INGREDIENTS_VERSION_KEY, RECIPE_VERSION_KEY,
+                              TAGS_VERSION_KEY, get_versions)
 from users.models import CustomUser, Subscription
 
 
@@ -43,6 +52,8 @@ class UserProfileSerializer(serializers.ModelSerializer):
 
     def get_is_subscribed(self, subscribing):
         '''Получение значения для поля пользователя is_subscribed.'''
+        if hasattr(subscribing, 'is_subscribed'):
+            return subscribing.is_subscribed
         if self.context.get('request') and not (
             self.context.get('request').user.is_anonymous
         ):
@@ -85,7 +96,7 @@ class SetPasswordSerializer(serializers.Serializer):
         password = self.validated_data['new_password']
         user = self.context['request'].user
         user.set_password(password)
-        user.save()
+        user.save(update_fields=('password',))
         return user
 
 
@@ -94,15 +105,27 @@ class RecipeShortReadSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_thumb', 'cooking_time')
         read_only_fields = fields
 
 
+class RecipeIdsSerializer(serializers.Serializer):
+    """Сериализатор списка id рецептов для пакетных операций."""
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_RECIPES_LIMIT
+    )
+
+    def validate_recipes(self, value):
+        '''Удаление повторяющихся id с сохранением порядка.'''
+        return list(dict.fromkeys(value))
+
+
 class SubscriptionSerializer(serializers.ModelSerializer):
     """Сериализатор для вывода информации о подписке пользователя."""
     is_subscribed = serializers.SerializerMethodField(default=False)
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
 
     class Meta:
         model = CustomUser
@@ -114,11 +137,15 @@ class SubscriptionSerializer(serializers.ModelSerializer):
             'last_name',
             'is_subscribed',
             'recipes',
-            'recipes_count'
+            'recipes_count',
+            'subscribers_count'
         )
+        read_only_fields = ('recipes_count', 'subscribers_count')
 
     def get_is_subscribed(self, subscribing):
         '''Получение значения для поля подписки пользователя is_subscribed.'''
+        if hasattr(subscribing, 'is_subscribed'):
+            return subscribing.is_subscribed
         if self.context.get('request'):
             return Subscription.objects.filter(
                 subscriber=self.context.get('request').user.id,
@@ -128,17 +155,16 @@ class SubscriptionSerializer(serializers.ModelSerializer):
 
     def get_recipes(self, subscriber):
         '''Получение рецептов автора с выводом нужного количества рецептов.'''
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
+        if hasattr(subscriber, 'limited_recipes'):
+            return RecipeShortReadSerializer(
+                subscriber.limited_recipes, many=True
+            ).data
+        limit = get_recipes_limit(self.context.get('request'))
         author_recipes = Recipe.objects.filter(author=subscriber)
-        if limit:
-            author_recipes = author_recipes[:int(limit)]
+        if limit is not None:
+            author_recipes = author_recipes[:limit]
         return RecipeShortReadSerializer(author_recipes, many=True).data
 
-    def get_recipes_count(self, subscribing):
-        '''Получение количества рецептов автора.'''
-        return Recipe.objects.filter(author=subscribing).count()
-
     def validate(self, data):
         '''Валидация данных о подписке в зависимости от метода запроса.'''
         request = self.context.get('request')
@@ -217,8 +243,22 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'color', 'slug')
 
 
+class RecipeListSerializer(serializers.ListSerializer):
+    """Вывод списка рецептов через кеш общих частей их данных."""
+
+    def to_representation(self, data):
+        recipes = data.all() if isinstance(data, models.Manager) else data
+        return self.child.represent_many(list(recipes))
+
+
 class RecipeReadSerializer(serializers.ModelSerializer):
-    """Сериализатор для вывода информации о рецепте."""
+    """
+    Сериализатор для вывода информации о рецепте.
+    Общая для всех пользователей часть данных рецепта кешируется по меткам
+    версий рецепта, ингредиентов и тегов, а поля is_favorited,
+    is_in_shopping_cart, author.is_subscribed и часто меняющийся счётчик
+    favorites_count добавляются к ней при каждом запросе.
+    """
     ingredients = IngredientToRecipeReadSerializer(
         source='recipe_to_ingredient',
         many=True
@@ -247,12 +287,138 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_thumb',
+            'image_detail',
             'text',
-            'cooking_time'
+            'cooking_time',
+            'favorites_count'
         )
+        read_only_fields = ('image_thumb', 'image_detail', 'favorites_count')
+        list_serializer_class = RecipeListSerializer
+
+    def to_representation(self, recipe):
+        '''Вывод рецепта через кеш общих частей данных.'''
+        return self.represent_many((recipe,))[0]
+
+    def get_cache_keys(self, recipes):
+        '''
+        Получение ключей кеша общих частей данных рецептов. Ключ зависит
+        от адреса сервера, так как ссылки на изображения абсолютные.
+        '''
+        request = self.context.get('request')
+        base_url = request.build_absolute_uri('/') if request else ''
+        version_keys = [
+            RECIPE_VERSION_KEY.format(recipe.pk) for recipe in recipes
+        ]
+        versions = get_versions(
+            version_keys + [INGREDIENTS_VERSION_KEY, TAGS_VERSION_KEY]
+        )
+        catalogue_version = '{}:{}'.format(
+            versions[INGREDIENTS_VERSION_KEY],
+            versions[TAGS_VERSION_KEY]
+        )
+        return [
+            f'recipe:{recipe.pk}:{versions[key]}:{catalogue_version}:'
+            f'{base_url}'
+            for recipe, key in zip(recipes, version_keys)
+        ]
+
+    def represent_many(self, recipes):
+        '''
+        Вывод списка рецептов: общие части данных берутся из кеша,
+        недостающие формируются и сохраняются в кеш.
+        '''
+        if not recipes:
+            return []
+        keys = self.get_cache_keys(recipes)
+        fragments = cache.get_many(keys)
+        missing = {
+            recipe.pk: key for recipe, key in zip(recipes, keys)
+            if key not in fragments
+        }
+        if missing:
+            fragments.update(self.get_shared_fragments(missing))
+        return [
+            self.get_user_fields(recipe, fragments[key]) if key in fragments
+            # рецепт уже удалён в основной базе
+            else super(RecipeReadSerializer, self).to_representation(recipe)
+            for recipe, key in zip(recipes, keys)
+        ]
+
+    def get_shared_fragments(self, keys):
+        '''
+        Формирование и кеширование общих частей данных рецептов по словарю
+        {id рецепта: ключ кеша}. Рецепты со связанными объектами читаются
+        из основной базы: метки версий меняются сразу после записи,
+        и данные отстающей реплики попали бы в кеш под новой меткой.
+        '''
+        with read_from_primary():
+            recipes = Recipe.objects.defer('search_vector').select_related(
+                'author'
+            ).prefetch_related(
+                'tags',
+                Prefetch(
+                    'recipe_to_ingredient',
+                    queryset=IngredientToRecipe.objects.select_related(
+                        'ingredient'
+                    )
+                )
+            ).in_bulk(keys)
+        fragments = {}
+        for pk, recipe in recipes.items():
+            # поля текущего пользователя в общую часть не входят
+            recipe.is_favorited = recipe.is_in_shopping_cart = False
+            recipe.author.is_subscribed = False
+            fragments[keys[pk]] = self.get_shared_fields(
+                super().to_representation(recipe)
+            )
+        cache.set_many(fragments, settings.RECIPE_CACHE_TIMEOUT)
+        return fragments
+
+    @staticmethod
+    def get_shared_fields(data):
+        '''Выделение общей для всех пользователей части данных рецепта.'''
+        shared = dict(data)
+        shared.pop('is_favorited')
+        shared.pop('is_in_shopping_cart')
+        shared.pop('favorites_count')
+        shared['author'] = dict(shared['author'])
+        shared['author'].pop('is_subscribed')
+        return shared
+
+    def get_user_fields(self, recipe, shared):
+        '''Добавление к общей части данных полей текущего запроса.'''
+        user_fields = {
+            'author': dict(
+                shared['author'],
+                is_subscribed=self.get_author_is_subscribed(recipe)
+            ),
+            'is_favorited': self.get_is_favorited(recipe),
+            'is_in_shopping_cart': self.get_is_in_shopping_cart(recipe),
+            'favorites_count': recipe.favorites_count
+        }
+        return {
+            field: user_fields[field] if field in user_fields
+            else shared[field]
+            for field in self.Meta.fields
+        }
+
+    def get_author_is_subscribed(self, recipe):
+        '''Получение значения поля is_subscribed автора рецепта.'''
+        if hasattr(recipe, 'author_is_subscribed'):
+            return recipe.author_is_subscribed
+        user = self.context.get('request').user
+        if user.is_anonymous:
+            return False
+        return Subscription.objects.filter(
+            subscriber=user,
+            subscribing_id=recipe.author_id
+        ).exists()
 
     def get_is_favorited(self, recipe):
-        '''Получение значения для поля рецепта is_subscribed.'''
+        '''Получение значения для поля рецепта is_favorited.'''
+        if hasattr(recipe, 'is_favorited'):
+            return recipe.is_favorited
         if not self.context.get('request').user.is_anonymous:
             return FavoriteRecipe.objects.filter(
                 user=self.context.get('request').user,
@@ -262,6 +428,8 @@ class RecipeReadSerializer(serializers.ModelSerializer):
 
     def get_is_in_shopping_cart(self, recipe):
         '''Получение значения для поля рецепта is_in_shopping_cart.'''
+        if hasattr(recipe, 'is_in_shopping_cart'):
+            return recipe.is_in_shopping_cart
         if not self.context.get('request').user.is_anonymous:
             return ShoppingCart.objects.filter(
                 user=self.context.get('request').user,
@@ -323,8 +491,20 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 _('Количество каждого ингредиента должно быть больше 0.')
             )
+        missing = set(ingred_list) - set(
+            Ingredient.objects.filter(
+                id__in=ingred_list
+            ).values_list('id', flat=True)
+        )
+        if missing:
+            raise serializers.ValidationError(
+                _('Ингредиенты с id {} не найдены.').format(
+                    ', '.join(map(str, sorted(missing)))
+                )
+            )
         return super().validate(recipe)
 
+    @transaction.atomic
     def create(self, validated_data):
         '''Переопределение метода create для создания нового рецепта.'''
         request = self.context['request']
@@ -340,47 +520,90 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             author=request.user,
             **validated_data
         )
-        self.add_entries_to_related_models(recipe, ingredients, tags)
+        self.set_ingredients(recipe, ingredients)
+        self.set_tags(recipe, tags)
+        make_renditions(recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, recipe, validated_data):
-        '''Переопределение метода update для обновления данных о рецепте.'''
+        '''
+        Переопределение метода update для обновления данных о рецепте.
+        Связанные ингредиенты и теги изменяются только при их изменении.
+        '''
         ingredients = validated_data.pop('ingredient_to_recipe')
         tags = validated_data.pop('tags')
-        IngredientToRecipe.objects.filter(
-            recipe=recipe,
-        ).delete()
-        TagToRecipe.objects.filter(
-            recipe=recipe,
-        ).delete()
-        self.add_entries_to_related_models(
-            recipe=recipe,
-            ingredients=ingredients,
-            tags=tags
+        with batch_changes():
+            amounts = self.set_ingredients(
+                recipe,
+                ingredients,
+                current=recipe.recipe_to_ingredient.all()
+            )
+        if amounts:
+            change_recipe_in_shopping_lists(recipe.pk, amounts)
+        self.set_tags(
+            recipe,
+            tags,
+            current=recipe.recipe_to_tag.values_list('tag_id', flat=True)
         )
-        return super().update(recipe, validated_data)
+        recipe = super().update(recipe, validated_data)
+        if 'image' in validated_data:
+            make_renditions(recipe)
+        return recipe
 
     @staticmethod
-    def add_entries_to_related_models(recipe, ingredients, tags):
+    def set_ingredients(recipe, ingredients, current=()):
         '''
-        Статический метод для создания/обновления рецепта в связанных таблицах.
+        Запись ингредиентов рецепта по разнице с текущими записями current:
+        новые добавляются, изменённые количества обновляются, лишние
+        удаляются. Возвращает изменение количества каждого ингредиента.
         '''
-        TagToRecipe.objects.bulk_create(
-            TagToRecipe(
-                recipe=recipe,
-                tag=tag,
-            )
-            for tag in tags
-        )
-        IngredientToRecipe.objects.bulk_create(
-            IngredientToRecipe(
+        current = {entry.ingredient_id: entry for entry in current}
+        amounts, to_create, to_update = {}, [], []
+        for ingredient in ingredients:
+            ingredient_id = ingredient['ingredient_id']
+            amount = ingredient['amount']
+            entry = current.pop(ingredient_id, None)
+            if entry is None:
+                to_create.append(
+                    IngredientToRecipe(
+                        recipe=recipe,
+                        ingredient_id=ingredient_id,
+                        amount=amount
+                    )
+                )
+                amounts[ingredient_id] = amount
+            elif entry.amount != amount:
+                amounts[ingredient_id] = amount - entry.amount
+                entry.amount = amount
+                to_update.append(entry)
+        for ingredient_id, entry in current.items():
+            amounts[ingredient_id] = -entry.amount
+        if current:
+            IngredientToRecipe.objects.filter(
+                pk__in=[entry.pk for entry in current.values()]
+            ).delete()
+        IngredientToRecipe.objects.bulk_update(to_update, ('amount',))
+        IngredientToRecipe.objects.bulk_create(to_create)
+        return {
+            ingredient_id: amount
+            for ingredient_id, amount in amounts.items()
+            if amount
+        }
+
+    @staticmethod
+    def set_tags(recipe, tags, current=()):
+        '''Запись тегов рецепта по разнице с текущими id тегов current.'''
+        current = set(current)
+        tag_ids = {tag.id for tag in tags}
+        if current - tag_ids:
+            TagToRecipe.objects.filter(
                 recipe=recipe,
-                ingredient=Ingredient.objects.get(
-                    id=ingredient.get('ingredient_id')
-                ),
-                amount=ingredient.get('amount'),
-            )
-            for ingredient in ingredients
+                tag_id__in=current - tag_ids
+            ).delete()
+        TagToRecipe.objects.bulk_create(
+            TagToRecipe(recipe=recipe, tag_id=tag_id)
+            for tag_id in tag_ids - current
         )
 
     def to_representation(self, instance):
@@ -0,0 +1,138 @@
+import csv
+import json
+import os
+import tempfile
+from functools import lru_cache
+from itertools import chain, islice
+
+from django.conf import settings
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+
+FONT_NAME = 'Tantular'
+FONT_PATH = os.path.join(
+    settings.BASE_DIR, 'backend_static/fonts/Tantular.ttf'
+)
+TITLE = 'Ваш список ингредиентов для выбранных рецептов:'
+EMPTY_TITLE = 'Ваш список покупок пуст.'
+TITLE_FONT_SIZE = 16
+LINE_FONT_SIZE = 14
+EMPTY_FONT_SIZE = 24
+X_POSITION = 50
+TOP_POSITION = 800
+BOTTOM_POSITION = 50
+TITLE_INDENT = 30
+LEADING = 15
+CSV_HEADER = ('name', 'measurement_unit', 'amount')
+
+
+@lru_cache(maxsize=None)
+def register_font():
+    """Однократная регистрация шрифта для pdf-файлов в процессе."""
+    pdfmetrics.registerFont(
+        TTFont(
+            name=FONT_NAME,
+            filename=FONT_PATH,
+            asciiReadable='UTF-8'
+        )
+    )
+    return FONT_NAME
+
+
+def format_line(number, name, measurement_unit, amount):
+    """Форматирование строки списка покупок."""
+    return f'{number}. {name.capitalize()} ({measurement_unit}) - {amount}'
+
+
+def paginate(lines):
+    """Разбиение строк списка покупок на страницы pdf-файла."""
+    top = TOP_POSITION - TITLE_INDENT
+    while True:
+        page = list(islice(lines, (top - BOTTOM_POSITION) // LEADING + 1))
+        if not page:
+            return
+        yield top, page
+        top = TOP_POSITION
+
+
+def render_pdf(ingredients):
+    """
+    Формирование pdf-файла со списком покупок.
+    Принимает строки (название, единица измерения, количество)
+    и возвращает временный файл с готовым документом.
+    """
+    font = register_font()
+    file = tempfile.TemporaryFile()
+    pdf = canvas.Canvas(file)
+    ingredients = iter(ingredients)
+    first = next(ingredients, None)
+    if first is None:
+        pdf.setFont(font, EMPTY_FONT_SIZE)
+        pdf.drawString(X_POSITION, TOP_POSITION, EMPTY_TITLE)
+    else:
+        pdf.setFont(font, TITLE_FONT_SIZE)
+        pdf.drawString(X_POSITION, TOP_POSITION, TITLE)
+        lines = (
+            format_line(number, *ingredient)
+            for number, ingredient in enumerate(
+                chain((first,), ingredients), start=1
+            )
+        )
+        for top, page in paginate(lines):
+            text = pdf.beginText(X_POSITION, top)
+            text.setFont(font, LINE_FONT_SIZE, leading=LEADING)
+            for line in page:
+                text.textLine(line)
+            pdf.drawText(text)
+            pdf.showPage()
+    pdf.save()
+    file.seek(0)
+    return file
+
+
+class Echo:
+    """Псевдо-буфер, возвращающий записанную строку вместо её хранения."""
+    def write(self, value):
+        return value
+
+
+def stream_txt(ingredients):
+    """Построчное формирование списка покупок в виде текста."""
+    ingredients = iter(ingredients)
+    first = next(ingredients, None)
+    if first is None:
+        yield f'{EMPTY_TITLE}\n'
+        return
+    yield f'{TITLE}\n'
+    for number, ingredient in enumerate(
+        chain((first,), ingredients), start=1
+    ):
+        yield f'{format_line(number, *ingredient)}\n'
+
+
+def stream_csv(ingredients):
+    """Построчное формирование списка покупок в формате csv."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for ingredient in ingredients:
+        yield writer.writerow(ingredient)
+
+
+def stream_json(ingredients):
+    """Поэлементное формирование списка покупок в формате json."""
+    yield '['
+    for number, ingredient in enumerate(ingredients):
+        separator = ', ' if number else ''
+        yield separator + json.dumps(
+            dict(zip(CSV_HEADER, ingredient)), ensure_ascii=False
+        )
+    yield ']'
+
+
+STREAMING_FORMATS = {
+    'csv': (stream_csv, 'text/csv'),
+    'txt': (stream_txt, 'text/plain'),
+    'json': (stream_json, 'application/json'),
+}
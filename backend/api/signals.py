@@ -0,0 +1,262 @@
+from collections import Counter
+
+from django.db.models import QuerySet
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import forget_tokens
+from api.utils import (add_to_feeds, change_counter,
+                       change_recipe_in_shopping_lists, change_shopping_list,
+                       changes_in_batch, follow_feed, get_recipes_amounts,
+                       unfollow_feed)
+from recipes.models import (FavoriteRecipe, IngredientToRecipe, Recipe,
+                            ShoppingCart)
+from users.models import CustomUser, Subscription
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """Сброс кеша токена при выходе пользователя или удалении токена."""
+    forget_tokens((instance.key,))
+
+
+@receiver(post_save, sender=CustomUser)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    """
+    Сброс кеша токенов пользователя при изменении его данных, в том числе
+    пароля и признака is_active. Обновление last_login при входе
+    пропускается.
+    """
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    forget_tokens(
+        Token.objects.filter(user=instance).values_list('key', flat=True)
+    )
+
+
+def deleted_directly(sender, origin):
+    """
+    Объект удалён сам, а не каскадно вместе с рецептом, ингредиентом или
+    пользователем: каскадные удаления учитываются в списках покупок
+    при удалении исходного объекта.
+    """
+    if origin is None:
+        return True
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, sender)
+
+
+def deleted_with(origin, model, pk):
+    """
+    Удаление начато с объекта model с первичным ключом pk: строка счётчика
+    удаляется вместе с ним, и изменять её не нужно.
+    """
+    return isinstance(origin, model) and origin.pk == pk
+
+
+def change_counters(model, field, deltas):
+    """Изменение счётчика field у объектов model по словарю {pk: delta}."""
+    for pk, delta in deltas.items():
+        if delta:
+            change_counter(model.objects.filter(pk=pk), field, delta)
+
+
+@receiver(pre_save, sender=ShoppingCart)
+@receiver(pre_save, sender=IngredientToRecipe)
+@receiver(pre_save, sender=FavoriteRecipe)
+@receiver(pre_save, sender=Subscription)
+@receiver(pre_save, sender=Recipe)
+def remember_previous(sender, instance, raw, update_fields, **kwargs):
+    """
+    Запоминание сохранённой версии записи перед её изменением. Если
+    сохраняются только поля без связей, например миниатюры рецепта,
+    запись не переносится, и сохранённая версия не нужна.
+    """
+    instance._previous = None
+    if update_fields is not None and not any(
+        sender._meta.get_field(name).is_relation for name in update_fields
+    ):
+        return
+    if instance.pk and not raw and not changes_in_batch.get():
+        instance._previous = sender.objects.filter(pk=instance.pk).first()
+
+
+@receiver(post_save, sender=ShoppingCart)
+def cart_saved(sender, instance, created, raw, **kwargs):
+    """Добавление ингредиентов рецепта из корзины в список покупок."""
+    previous = getattr(instance, '_previous', None)
+    if raw or changes_in_batch.get() or (
+        previous is None and not created
+    ):
+        return
+    if previous is not None:
+        if (previous.user_id, previous.recipe_id) == (
+            instance.user_id, instance.recipe_id
+        ):
+            return
+        change_shopping_list(
+            previous.user_id, (previous.recipe_id,), sign=-1
+        )
+    change_shopping_list(instance.user_id, (instance.recipe_id,))
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def cart_deleted(sender, instance, origin=None, **kwargs):
+    """Вычитание ингредиентов рецепта из списка покупок."""
+    if deleted_directly(sender, origin) and not changes_in_batch.get():
+        change_shopping_list(
+            instance.user_id, (instance.recipe_id,), sign=-1
+        )
+
+
+@receiver(post_save, sender=IngredientToRecipe)
+def recipe_ingredient_saved(sender, instance, created, raw, **kwargs):
+    """
+    Изменение списков покупок, в которых есть рецепт, после добавления
+    или изменения его ингредиента, в том числе в админке.
+    """
+    previous = getattr(instance, '_previous', None)
+    if raw or changes_in_batch.get() or (
+        previous is None and not created
+    ):
+        return
+    amounts = Counter()
+    if previous is not None:
+        if previous.recipe_id == instance.recipe_id:
+            amounts[previous.ingredient_id] -= previous.amount
+        else:
+            change_recipe_in_shopping_lists(
+                previous.recipe_id,
+                {previous.ingredient_id: -previous.amount}
+            )
+    amounts[instance.ingredient_id] += instance.amount
+    change_recipe_in_shopping_lists(instance.recipe_id, amounts)
+
+
+@receiver(post_delete, sender=IngredientToRecipe)
+def recipe_ingredient_deleted(sender, instance, origin=None, **kwargs):
+    """Вычитание удалённого ингредиента рецепта из списков покупок."""
+    if deleted_directly(sender, origin) and not changes_in_batch.get():
+        change_recipe_in_shopping_lists(
+            instance.recipe_id, {instance.ingredient_id: -instance.amount}
+        )
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_deleting(sender, instance, **kwargs):
+    """
+    Вычитание ингредиентов удаляемого рецепта из списков покупок
+    до каскадного удаления его записей в корзинах и ингредиентов.
+    """
+    change_recipe_in_shopping_lists(
+        instance.pk,
+        {
+            ingredient_id: -amount
+            for ingredient_id, amount in get_recipes_amounts(
+                (instance.pk,)
+            ).items()
+        }
+    )
+
+
+@receiver(post_save, sender=FavoriteRecipe)
+def favorite_saved(sender, instance, created, raw, **kwargs):
+    """
+    Изменение счётчика добавлений в "Избранное" у рецепта после
+    добавления записи, в том числе в админке, или её переноса
+    на другой рецепт.
+    """
+    previous = getattr(instance, '_previous', None)
+    if raw or changes_in_batch.get() or (previous is None and not created):
+        return
+    deltas = Counter({instance.recipe_id: 1})
+    if previous is not None:
+        deltas[previous.recipe_id] -= 1
+    change_counters(Recipe, 'favorites_count', deltas)
+
+
+@receiver(post_delete, sender=FavoriteRecipe)
+def favorite_deleted(sender, instance, origin=None, **kwargs):
+    """
+    Уменьшение счётчика добавлений в "Избранное" у рецепта, в том числе
+    при каскадном удалении записей вместе с пользователем.
+    """
+    if changes_in_batch.get() or deleted_with(
+        origin, Recipe, instance.recipe_id
+    ):
+        return
+    change_counter(
+        Recipe.objects.filter(pk=instance.recipe_id), 'favorites_count', -1
+    )
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_saved(sender, instance, created, raw, **kwargs):
+    """
+    Изменение счётчика подписчиков автора и ленты подписчика после
+    создания подписки, в том числе в админке, или её изменения.
+    """
+    previous = getattr(instance, '_previous', None)
+    if raw or changes_in_batch.get() or (previous is None and not created):
+        return
+    pair = (instance.subscriber_id, instance.subscribing_id)
+    deltas = Counter({instance.subscribing_id: 1})
+    if previous is not None:
+        if (previous.subscriber_id, previous.subscribing_id) == pair:
+            return
+        deltas[previous.subscribing_id] -= 1
+        unfollow_feed(previous.subscriber_id, previous.subscribing_id)
+    change_counters(CustomUser, 'subscribers_count', deltas)
+    follow_feed(*pair)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted(sender, instance, origin=None, **kwargs):
+    """
+    Уменьшение счётчика подписчиков автора, в том числе при каскадном
+    удалении подписок вместе с подписчиком. Записи ленты при каскадном
+    удалении удаляются вместе с подписчиком или рецептами автора.
+    """
+    if changes_in_batch.get():
+        return
+    if not deleted_with(origin, CustomUser, instance.subscribing_id):
+        change_counter(
+            CustomUser.objects.filter(pk=instance.subscribing_id),
+            'subscribers_count',
+            -1
+        )
+    if deleted_directly(sender, origin):
+        unfollow_feed(instance.subscriber_id, instance.subscribing_id)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, created, raw, **kwargs):
+    """
+    Изменение счётчика рецептов автора и добавление нового рецепта
+    в ленты подписчиков, в том числе при создании в админке. При смене
+    автора в админке ленты пересчитывает команда rebuild_feeds.
+    """
+    previous = getattr(instance, '_previous', None)
+    if raw or changes_in_batch.get() or (previous is None and not created):
+        return
+    deltas = Counter({instance.author_id: 1})
+    if previous is not None:
+        deltas[previous.author_id] -= 1
+    change_counters(CustomUser, 'recipes_count', deltas)
+    if created:
+        add_to_feeds(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, origin=None, **kwargs):
+    """Уменьшение счётчика рецептов автора при удалении рецепта."""
+    if not changes_in_batch.get() and not deleted_with(
+        origin, CustomUser, instance.author_id
+    ):
+        change_counter(
+            CustomUser.objects.filter(pk=instance.author_id),
+            'recipes_count',
+            -1
+        )
@@ -0,0 +1,91 @@
+import base64
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import (Ingredient, IngredientToRecipe, Recipe, Tag,
+                            TagToRecipe)
+from users.models import CustomUser
+
+PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhg'
+    'GAWjR9awAAAABJRU5ErkJggg=='
+)
+IMAGE = 'data:image/png;base64,' + base64.b64encode(PNG).decode()
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class FoodgramTestCase(TestCase):
+    """
+    Базовый класс тестов API: два пользователя, теги, ингредиенты
+    и клиенты с токеном и без него. Кеш очищается перед каждым тестом.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            username='user', email='user@foodgram.ru', password='password',
+            first_name='Иван', last_name='Иванов'
+        )
+        cls.author = CustomUser.objects.create_user(
+            username='author', email='author@foodgram.ru',
+            password='password', first_name='Пётр', last_name='Петров'
+        )
+        cls.tags = Tag.objects.bulk_create(
+            Tag(name=f'Тег {i}', color=color, slug=f'tag{i}')
+            for i, color in enumerate(('#FF0000', '#00FF00', '#0000FF'))
+        )
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'ингредиент {i:02}', measurement_unit='г')
+            for i in range(20)
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.anonymous = APIClient()
+
+    @classmethod
+    def create_recipes(cls, count, author=None, ingredients=3, start=0):
+        '''
+        Создание рецептов с ingredients ингредиентами по 1, 2, 3... единицы
+        и одним тегом у каждого.
+        '''
+        recipes = []
+        for number in range(start, start + count):
+            recipe = Recipe.objects.create(
+                author=author or cls.author,
+                name=f'Рецепт {number}',
+                text='Описание',
+                cooking_time=10,
+                image=ContentFile(PNG, name='recipe.png')
+            )
+            IngredientToRecipe.objects.bulk_create(
+                IngredientToRecipe(
+                    recipe=recipe,
+                    ingredient=cls.ingredients[
+                        (number + i) % len(cls.ingredients)
+                    ],
+                    amount=i + 1
+                )
+                for i in range(ingredients)
+            )
+            TagToRecipe.objects.create(
+                recipe=recipe,
+                tag=cls.tags[number % len(cls.tags)]
+            )
+            recipes.append(recipe)
+        return recipes
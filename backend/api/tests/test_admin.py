@@ -0,0 +1,141 @@
+from io import StringIO
+
+from django import forms
+from django.contrib import admin
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api.tests.base import FoodgramTestCase
+from recipes.models import (FavoriteRecipe, IngredientToRecipe,
+                            ShoppingCart, ShoppingListItem)
+from users.models import CustomUser, Subscription
+
+
+class AdminTestCase(FoodgramTestCase):
+    """Клиент админки, вошедший под суперпользователем."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin_user = CustomUser.objects.create_superuser(
+            username='admin', email='admin@foodgram.ru', password='password'
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.admin = Client()
+        self.admin.force_login(self.admin_user)
+
+
+class ChangelistQueriesTest(AdminTestCase):
+    """
+    Количество запросов списков объектов в админке не зависит от числа
+    строк на странице.
+    """
+
+    def add_rows(self, start):
+        recipes = self.create_recipes(5, start=start)
+        users = [
+            CustomUser.objects.create_user(
+                username=f'user{number}', email=f'user{number}@foodgram.ru',
+                password='password'
+            )
+            for number in range(start, start + 5)
+        ]
+        for user in users:
+            Subscription.objects.create(
+                subscriber=user, subscribing=self.author
+            )
+            for recipe in recipes:
+                FavoriteRecipe.objects.create(user=user, recipe=recipe)
+                ShoppingCart.objects.create(user=user, recipe=recipe)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.admin.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelists(self):
+        urls = [
+            reverse(
+                f'admin:{model._meta.app_label}_'
+                f'{model._meta.model_name}_changelist'
+            )
+            for model in admin.site._registry
+        ]
+        self.add_rows(0)
+        expected = {url: self.count_queries(url) for url in urls}
+        self.add_rows(5)
+        self.assertTrue(ShoppingListItem.objects.exists())
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), expected[url])
+
+
+class RecipeInlinesTest(AdminTestCase):
+    """
+    Правка ингредиентов рецепта в админке обновляет списки покупок
+    и кеш рецепта.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipe, = cls.create_recipes(1)
+
+    def form_data(self, response):
+        '''Данные формы изменения рецепта со всеми инлайнами.'''
+        formsets = [
+            inline.formset
+            for inline in response.context['inline_admin_formsets']
+        ]
+        data = {}
+        for form in [response.context['adminform'].form] + [
+            form
+            for formset in formsets
+            for form in [formset.management_form] + formset.forms
+        ]:
+            for field in form:
+                value = field.value()
+                if (
+                    value in (None, False)
+                    or isinstance(field.field, forms.FileField)
+                ):
+                    continue
+                data[field.html_name] = value
+        return data
+
+    def test_ingredient_inline(self):
+        self.client.post(f'/api/recipes/{self.recipe.pk}/shopping_cart/')
+        self.client.get(f'/api/recipes/{self.recipe.pk}/')
+        url = reverse('admin:recipes_recipe_change', args=(self.recipe.pk,))
+        data = self.form_data(self.admin.get(url))
+        data['recipe_to_ingredient-0-amount'] = 50
+        data['recipe_to_ingredient-TOTAL_FORMS'] = 4
+        data['recipe_to_ingredient-3-ingredient'] = self.ingredients[-1].pk
+        data['recipe_to_ingredient-3-amount'] = 7
+        data['recipe_to_ingredient-3-recipe'] = self.recipe.pk
+        response = self.admin.post(url, data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            sorted(
+                IngredientToRecipe.objects.filter(
+                    recipe=self.recipe
+                ).values_list('amount', flat=True)
+            ),
+            [2, 3, 7, 50]
+        )
+        call_command('rebuild_shopping_lists', '--verify', stdout=StringIO())
+        self.assertEqual(
+            sorted(
+                ingredient['amount']
+                for ingredient in self.client.get(
+                    f'/api/recipes/{self.recipe.pk}/'
+                ).data['ingredients']
+            ),
+            [2, 3, 7, 50]
+        )
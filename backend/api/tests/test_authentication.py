@@ -0,0 +1,40 @@
+from django.core.cache import cache
+
+from api.authentication import get_token_cache_key
+from api.tests.base import FoodgramTestCase
+from users.models import CustomUser
+
+
+class CachedTokenTest(FoodgramTestCase):
+    """Пользователь, взятый из кеша аутентификации по токену."""
+
+    def setUp(self):
+        super().setUp()
+        response = self.client.get('/api/users/me/')
+        self.assertEqual(response.status_code, 200)
+        CustomUser.objects.filter(pk=self.user.pk).update(
+            recipes_count=1, subscribers_count=1
+        )
+
+    def test_set_password_keeps_counters(self):
+        response = self.client.post(
+            '/api/users/set_password/',
+            {'current_password': 'password', 'new_password': 'Nfd8s!kq2L'}
+        )
+        self.assertEqual(response.status_code, 204)
+        user = CustomUser.objects.get(pk=self.user.pk)
+        self.assertEqual((user.recipes_count, user.subscribers_count), (1, 1))
+        self.assertTrue(user.check_password('Nfd8s!kq2L'))
+
+    def test_deactivated(self):
+        self.user.is_active = False
+        self.user.save(update_fields=('is_active',))
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+    def test_inactive_cached_user(self):
+        cache_key = get_token_cache_key(self.token.key)
+        token = cache.get(cache_key)
+        token.user.is_active = False
+        cache.set(cache_key, token)
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+        self.assertIsNone(cache.get(cache_key))
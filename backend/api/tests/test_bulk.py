@@ -0,0 +1,92 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.base import FoodgramTestCase
+from recipes.models import FavoriteRecipe, Recipe, ShoppingCart
+
+
+class BulkListsTest(FoodgramTestCase):
+    """Пакетное добавление и удаление рецептов в "Избранном" и корзине."""
+
+    urls = {
+        FavoriteRecipe: '/api/recipes/favorite/',
+        ShoppingCart: '/api/recipes/shopping_cart/',
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipes = cls.create_recipes(30)
+        cls.ids = [recipe.pk for recipe in cls.recipes]
+
+    def send(self, method, model, ids):
+        response = getattr(self.client, method)(
+            self.urls[model], {'recipes': ids}, format='json'
+        )
+        return response.status_code, {
+            row['id']: row['status'] for row in response.data['recipes']
+        }
+
+    def assert_consistent(self):
+        for recipe in Recipe.objects.all():
+            self.assertEqual(
+                recipe.favorites_count,
+                FavoriteRecipe.objects.filter(recipe=recipe).count()
+            )
+        call_command('rebuild_shopping_lists', '--verify', stdout=StringIO())
+
+    def test_statuses(self):
+        missing = max(self.ids) + 1
+        for model in self.urls:
+            with self.subTest(model=model.__name__):
+                self.send('post', model, self.ids[:2])
+                self.assertEqual(
+                    self.send('post', model, self.ids[:4] + [missing]),
+                    (201, {
+                        self.ids[0]: 'exists', self.ids[1]: 'exists',
+                        self.ids[2]: 'added', self.ids[3]: 'added',
+                        missing: 'not_found'
+                    })
+                )
+                self.assert_consistent()
+                self.assertEqual(
+                    self.send('delete', model, self.ids[3:6] + [missing]),
+                    (200, {
+                        self.ids[3]: 'deleted', self.ids[4]: 'missing',
+                        self.ids[5]: 'missing', missing: 'not_found'
+                    })
+                )
+                self.assert_consistent()
+
+    def test_double_submit(self):
+        for model in self.urls:
+            with self.subTest(model=model.__name__):
+                self.assertEqual(
+                    self.send('post', model, self.ids[:5])[0], 201
+                )
+                status, results = self.send('post', model, self.ids[:5])
+                self.assertEqual(status, 200)
+                self.assertEqual(set(results.values()), {'exists'})
+                self.assert_consistent()
+                self.send('delete', model, self.ids[:5])
+                status, results = self.send('delete', model, self.ids[:5])
+                self.assertEqual(set(results.values()), {'missing'})
+                self.assert_consistent()
+
+    def test_queries(self):
+        self.client.get('/api/users/me/')
+        for model in self.urls:
+            for method in ('post', 'delete'):
+                counts = []
+                for ids in (self.ids[:1], self.ids):
+                    self.send('delete', model, self.ids)
+                    if method == 'delete':
+                        self.send('post', model, ids)
+                    with CaptureQueriesContext(connection) as queries:
+                        self.send(method, model, ids)
+                    counts.append(len(queries))
+                with self.subTest(model=model.__name__, method=method):
+                    self.assertEqual(counts[0], counts[1])
@@ -0,0 +1,90 @@
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+
+from api.tests.base import FoodgramTestCase
+from api.urls import async_urls
+from api.urls import urlpatterns as api_urlpatterns
+from recipes.models import Ingredient, Tag
+from recipes.versions import (INGREDIENTS_VERSION_KEY, TAGS_VERSION_KEY,
+                              get_version)
+
+
+class CatalogueVersionTest(FoodgramTestCase):
+    """Смена версий тегов и ингредиентов до и после фиксации транзакции."""
+
+    def test_version_bumped_on_commit(self):
+        changes = (
+            (
+                INGREDIENTS_VERSION_KEY,
+                lambda: Ingredient.objects.create(
+                    name='соль', measurement_unit='г'
+                )
+            ),
+            (
+                TAGS_VERSION_KEY,
+                lambda: Tag.objects.create(
+                    name='Ужин', color='#000000', slug='dinner'
+                )
+            ),
+            (INGREDIENTS_VERSION_KEY, self.ingredients[0].delete),
+            (TAGS_VERSION_KEY, self.tags[0].delete),
+        )
+        for key, change in changes:
+            with self.subTest(key=key, change=change):
+                before = get_version(key)
+                with self.captureOnCommitCallbacks() as callbacks:
+                    change()
+                inside = get_version(key)
+                self.assertNotEqual(inside, before)
+                for callback in callbacks:
+                    callback()
+                self.assertNotEqual(get_version(key), inside)
+
+
+class AsyncCatalogueTest(FoodgramTestCase):
+    """
+    Асинхронные представления справочников режима ASGI отвечают так же,
+    как вьюсеты DRF.
+    """
+
+    def get_async(self, path, **headers):
+        with self.settings(ROOT_URLCONF=__name__):
+            return async_to_sync(self.async_client.get)(path, **headers)
+
+    def clear_responses(self):
+        '''Очистка кеша ответов с сохранением меток версий.'''
+        versions = cache.get_many((TAGS_VERSION_KEY, INGREDIENTS_VERSION_KEY))
+        cache.clear()
+        cache.set_many(versions, timeout=None)
+
+    def test_same_responses(self):
+        tag, ingredient = self.tags[0].pk, self.ingredients[0].pk
+        for path in (
+            '/api/tags/',
+            f'/api/tags/{tag}/',
+            '/api/tags/0/',
+            '/api/ingredients/',
+            f'/api/ingredients/{ingredient}/',
+            '/api/ingredients/?name=ингредиент 1',
+            '/api/ingredients/?search=ингредиент&limit=3',
+            '/api/ingredients/?name=ингредиент&measurement_unit=г',
+        ):
+            with self.subTest(path=path):
+                expected = self.anonymous.get(path)
+                self.clear_responses()
+                response = self.get_async(path)
+                self.clear_responses()
+                self.assertEqual(
+                    response.status_code, expected.status_code
+                )
+                self.assertEqual(response.json(), expected.json())
+                self.assertEqual(response.get('ETag'), expected.get('ETag'))
+
+    def test_not_modified(self):
+        etag = self.anonymous.get('/api/tags/')['ETag']
+        response = self.get_async('/api/tags/', **{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+
+urlpatterns = async_urls + api_urlpatterns
@@ -0,0 +1,130 @@
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from api.tests.base import PNG, FoodgramTestCase
+from recipes.models import FavoriteRecipe, FeedEntry, Recipe
+from users.models import CustomUser, Subscription
+
+
+class CountersTest(FoodgramTestCase):
+    """
+    Счётчики рецептов, подписчиков и добавлений в "Избранное"
+    изменяются сигналами при любых изменениях, в том числе каскадных
+    и вне API.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipes = cls.create_recipes(3)
+        cls.reader = CustomUser.objects.create_user(
+            username='reader', email='reader@foodgram.ru',
+            password='password'
+        )
+
+    def assert_counters(self):
+        call_command('recount', '--verify', stdout=StringIO())
+
+    def assert_feeds(self):
+        call_command('rebuild_feeds', '--verify', stdout=StringIO())
+
+    def subscribe_and_favorite(self, user):
+        Subscription.objects.create(subscriber=user, subscribing=self.author)
+        for recipe in self.recipes:
+            FavoriteRecipe.objects.create(user=user, recipe=recipe)
+
+    def test_api(self):
+        recipe = self.recipes[0]
+        self.client.post(f'/api/recipes/{recipe.pk}/favorite/')
+        self.client.post(f'/api/users/{self.author.pk}/subscribe/')
+        recipe.refresh_from_db()
+        self.author.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 1)
+        self.assertEqual(self.author.subscribers_count, 1)
+        self.assertEqual(self.author.recipes_count, 3)
+        self.assert_counters()
+        self.client.delete(f'/api/recipes/{recipe.pk}/favorite/')
+        self.client.delete(f'/api/users/{self.author.pk}/subscribe/')
+        self.assert_counters()
+
+    def test_orm(self):
+        self.subscribe_and_favorite(self.user)
+        self.assert_counters()
+        favorite = FavoriteRecipe.objects.get(
+            user=self.user, recipe=self.recipes[0]
+        )
+        favorite.user = self.reader
+        favorite.save()
+        subscription = Subscription.objects.get(subscriber=self.user)
+        subscription.subscribing = self.reader
+        subscription.save()
+        recipe = Recipe.objects.get(pk=self.recipes[1].pk)
+        recipe.author = self.user
+        recipe.save()
+        self.assert_counters()
+        favorite.recipe = self.recipes[2]
+        favorite.save()
+        self.assert_counters()
+        FavoriteRecipe.objects.filter(user=self.user).delete()
+        subscription.delete()
+        Recipe.objects.create(
+            author=self.user, name='Новый', text='Описание',
+            cooking_time=5, image=ContentFile(PNG, name='recipe.png')
+        )
+        self.assert_counters()
+
+    def test_user_deleted(self):
+        for user in (self.user, self.reader):
+            self.subscribe_and_favorite(user)
+        Subscription.objects.create(
+            subscriber=self.author, subscribing=self.reader
+        )
+        admin = APIClient()
+        admin.force_authenticate(
+            CustomUser.objects.create_superuser(
+                username='admin', email='admin@foodgram.ru',
+                password='password'
+            )
+        )
+        response = admin.delete(f'/api/users/{self.user.pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.subscribers_count, 1)
+        self.assertEqual(
+            [recipe.favorites_count for recipe in Recipe.objects.all()],
+            [1, 1, 1]
+        )
+        self.assert_counters()
+        self.author.delete()
+        self.reader.refresh_from_db()
+        self.assertEqual(self.reader.subscribers_count, 0)
+        self.assert_counters()
+
+    def test_recipe_deleted(self):
+        self.subscribe_and_favorite(self.user)
+        self.recipes[0].delete()
+        Recipe.objects.filter(pk=self.recipes[1].pk).delete()
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 1)
+        self.assert_counters()
+
+    @override_settings(FEED_PRECOMPUTE=True)
+    def test_feeds(self):
+        self.subscribe_and_favorite(self.user)
+        self.assertEqual(FeedEntry.objects.filter(user=self.user).count(), 3)
+        self.create_recipes(1, start=3)
+        self.assert_feeds()
+        subscription = Subscription.objects.get(subscriber=self.user)
+        subscription.subscriber = self.reader
+        subscription.save()
+        self.assertFalse(FeedEntry.objects.filter(user=self.user).exists())
+        self.assert_feeds()
+        self.recipes[0].delete()
+        self.assert_feeds()
+        subscription.delete()
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assert_feeds()
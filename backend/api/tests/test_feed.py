@@ -0,0 +1,128 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.base import FoodgramTestCase
+from recipes.models import FeedEntry, Recipe
+from users.models import CustomUser, Subscription
+
+
+class FeedTest(FoodgramTestCase):
+    """
+    Лента подписок с подпиской, проверяемой подзапросом EXISTS:
+    пагинация по курсору, рецепты только авторов из подписок
+    пользователя, постоянное количество запросов.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_author = cls.create_author('other')
+        cls.stranger = cls.create_author('stranger')
+        cls.create_recipes(3, start=0)
+        cls.create_recipes(2, author=cls.other_author, start=3)
+        cls.create_recipes(2, author=cls.stranger, start=5)
+        for author in (cls.author, cls.other_author):
+            Subscription.objects.create(
+                subscriber=cls.user, subscribing=author
+            )
+        Subscription.objects.create(
+            subscriber=cls.other_author, subscribing=cls.stranger
+        )
+
+    @classmethod
+    def create_author(cls, username):
+        return CustomUser.objects.create_user(
+            username=username, email=f'{username}@foodgram.ru',
+            password='password'
+        )
+
+    def expected(self, *authors):
+        return list(
+            Recipe.objects.filter(
+                author__in=authors
+            ).order_by('-created').values_list('pk', flat=True)
+        )
+
+    def get_feed(self, url='/api/recipes/feed/?limit=2'):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def read_feed(self):
+        '''id рецептов со всех страниц ленты по ссылкам next.'''
+        ids, url = [], '/api/recipes/feed/?limit=2'
+        while url:
+            data = self.get_feed(url)
+            ids += [recipe['id'] for recipe in data['results']]
+            url = data['next']
+        return ids
+
+    def test_cursor_links(self):
+        first = self.get_feed()
+        self.assertIsNone(first['previous'])
+        second = self.get_feed(first['next'])
+        self.assertEqual(
+            self.get_feed(second['previous'])['results'], first['results']
+        )
+        self.assertEqual(
+            self.read_feed(), self.expected(self.author, self.other_author)
+        )
+
+    def test_only_own_subscriptions(self):
+        self.assertNotIn(
+            self.stranger.pk,
+            [
+                recipe['author']['id']
+                for recipe in self.get_feed('/api/recipes/feed/')['results']
+            ]
+        )
+        self.assertEqual(
+            self.anonymous.get('/api/recipes/feed/').status_code, 401
+        )
+
+    def test_unsubscribe(self):
+        response = self.client.delete(
+            f'/api/users/{self.other_author.pk}/subscribe/'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.read_feed(), self.expected(self.author))
+
+    def test_constant_queries(self):
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                self.get_feed('/api/recipes/feed/?limit=20')
+            return len(queries)
+
+        self.get_feed()
+        expected = count_queries()
+        for number in range(5):
+            author = self.create_author(f'author{number}')
+            self.create_recipes(2, author=author, start=10 + 2 * number)
+            Subscription.objects.create(
+                subscriber=self.user, subscribing=author
+            )
+        self.assertEqual(count_queries(), expected)
+        self.assertEqual(len(self.read_feed()), 15)
+
+
+@override_settings(FEED_PRECOMPUTE=True)
+class PrecomputedFeedTest(FeedTest):
+    """
+    Лента подписок из предрассчитанной таблицы FeedEntry, которую
+    заполняют сигналы подписок и рецептов.
+    """
+
+    def test_only_own_subscriptions(self):
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.other_author).exists()
+        )
+        super().test_only_own_subscriptions()
+
+    def test_unsubscribe(self):
+        super().test_unsubscribe()
+        self.assertFalse(
+            FeedEntry.objects.filter(
+                user=self.user, recipe__author=self.other_author
+            ).exists()
+        )
@@ -0,0 +1,112 @@
+from itertools import combinations
+
+from django.db import connection
+from django.test import RequestFactory
+
+from api.filters import RecipeFilter
+from api.tests.base import FoodgramTestCase
+from recipes.models import FavoriteRecipe, Recipe, ShoppingCart, TagToRecipe
+
+FILTERS = {
+    'tags': TagToRecipe,
+    'is_favorited': FavoriteRecipe,
+    'is_in_shopping_cart': ShoppingCart,
+    'author': None,
+}
+
+
+class RecipeFilterTest(FoodgramTestCase):
+    """Фильтры рецептов: отсутствие дублей и планы запросов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipes = cls.create_recipes(6)
+        for recipe in cls.recipes:
+            TagToRecipe.objects.get_or_create(recipe=recipe, tag=cls.tags[0])
+            TagToRecipe.objects.get_or_create(recipe=recipe, tag=cls.tags[1])
+        for recipe in cls.recipes[:4]:
+            FavoriteRecipe.objects.create(user=cls.user, recipe=recipe)
+        for recipe in cls.recipes[2:]:
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def get_queryset(self, names):
+        values = {
+            'tags': [self.tags[0].slug, self.tags[1].slug],
+            'is_favorited': 'true',
+            'is_in_shopping_cart': 'true',
+            'author': str(self.author.pk),
+        }
+        request = RequestFactory().get('/api/recipes/')
+        request.user = self.user
+        data = request.GET.copy()
+        for name in names:
+            if name == 'tags':
+                data.setlist(name, values[name])
+            else:
+                data[name] = values[name]
+        return RecipeFilter(
+            data, queryset=Recipe.objects.all(), request=request
+        ).qs
+
+    def get_plan(self, queryset):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def assert_index_scans(self, plan, models):
+        """
+        Подзапросы EXISTS выполняются поиском по индексу: в PostgreSQL
+        по их таблицам нет Seq Scan, в SQLite полный просмотр (SCAN)
+        допустим только для самой таблицы рецептов.
+        """
+        if connection.vendor == 'postgresql':
+            for model in models:
+                self.assertNotIn(f'Seq Scan on {model._meta.db_table}', plan)
+            return
+        recipes_table = Recipe._meta.db_table
+        subqueries = 0
+        for line in plan.splitlines():
+            if ' SCAN ' in f' {line} ':
+                self.assertIn(f'SCAN {recipes_table}', line, plan)
+            if 'SEARCH U' in line:
+                subqueries += 1
+                self.assertIn('INDEX', line, plan)
+        self.assertEqual(subqueries, len(models), plan)
+
+    def test_several_tags_return_recipe_once(self):
+        response = self.client.get(
+            '/api/recipes/',
+            {'tags': [self.tags[0].slug, self.tags[1].slug], 'limit': 50}
+        )
+        ids = [recipe['id'] for recipe in response.data['results']]
+        self.assertEqual(sorted(ids), sorted(set(ids)))
+        self.assertEqual(response.data['count'], len(self.recipes))
+
+    def test_filter_combinations(self):
+        expected = {
+            'tags': set(self.recipes),
+            'is_favorited': set(self.recipes[:4]),
+            'is_in_shopping_cart': set(self.recipes[2:]),
+            'author': set(self.recipes),
+        }
+        for size in range(len(FILTERS) + 1):
+            for names in combinations(FILTERS, size):
+                with self.subTest(filters=names):
+                    queryset = self.get_queryset(names)
+                    self.assertNotIn('DISTINCT', str(queryset.query))
+                    result = list(queryset)
+                    self.assertEqual(len(result), len(set(result)))
+                    self.assertEqual(
+                        set(result),
+                        set(self.recipes).intersection(
+                            *(expected[name] for name in names)
+                        )
+                    )
+                    plan = self.get_plan(queryset)
+                    self.assertNotIn('DISTINCT', plan)
+                    self.assert_index_scans(
+                        plan,
+                        [FILTERS[name] for name in names if FILTERS[name]]
+                    )
@@ -0,0 +1,69 @@
+import re
+
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from api.metrics import WORKERS_KEY, MetricsRegistry
+from api.tests.base import FoodgramTestCase
+from users.models import CustomUser
+
+COUNT = re.compile(
+    r'^foodgram_request_duration_seconds_count\{route="(.+)"\} (\d+)$',
+    re.MULTILINE
+)
+
+
+class MetricsTest(FoodgramTestCase):
+    """
+    Выгрузка метрик суммирует гистограммы всех воркеров из общего кеша.
+    Воркеры изображают отдельные экземпляры MetricsRegistry.
+    """
+
+    def counts(self, text):
+        return {route: int(count) for route, count in COUNT.findall(text)}
+
+    def test_workers_summed(self):
+        workers = [MetricsRegistry() for _ in range(3)]
+        for number, worker in enumerate(workers, start=1):
+            for _ in range(number):
+                worker.observe('tags-list', request_duration_seconds=0.01)
+        workers[2].observe('recipes-list', request_duration_seconds=0.2)
+        for worker in workers:
+            worker.publish()
+        expected = {'recipes-list': 1, 'tags-list': 6}
+        for worker in workers:
+            with self.subTest(worker=workers.index(worker)):
+                self.assertEqual(self.counts(worker.render()), expected)
+        cache.delete(WORKERS_KEY)
+        workers[0].observe('tags-list', request_duration_seconds=0.01)
+        self.assertEqual(
+            self.counts(workers[1].render()), {'tags-list': 2}
+        )
+        workers[0].publish()
+        self.assertEqual(
+            self.counts(workers[1].render()), {'tags-list': 4}
+        )
+
+    def test_expired_worker_dropped(self):
+        first, second = MetricsRegistry(), MetricsRegistry()
+        first.observe('tags-list', request_duration_seconds=0.01)
+        second.observe('tags-list', request_duration_seconds=0.01)
+        cache.delete(first._key)
+        self.assertEqual(self.counts(second.render()), {'tags-list': 1})
+        self.assertEqual(cache.get(WORKERS_KEY), {second._key})
+
+    def test_view(self):
+        admin = APIClient()
+        admin.force_authenticate(
+            CustomUser.objects.create_superuser(
+                username='admin', email='admin@foodgram.ru',
+                password='password'
+            )
+        )
+        self.anonymous.get('/api/tags/')
+        response = admin.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(
+            self.counts(response.content.decode())['tags-list'], 1
+        )
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
@@ -0,0 +1,110 @@
+from api.tests.base import FoodgramTestCase
+from users.models import CustomUser, Subscription
+
+
+class CountStrategyTest(FoodgramTestCase):
+    """
+    Закешированный или оценочный подсчёт влияет только на поле count:
+    страницы и ссылка next определяются по самим данным.
+    """
+
+    def test_recipes_added_after_cached_count(self):
+        self.create_recipes(3)
+        response = self.client.get('/api/recipes/?limit=2')
+        self.assertEqual(response.data['count'], 3)
+        self.create_recipes(3, start=3)
+        response = self.client.get('/api/recipes/?limit=2&page=2')
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+        response = self.client.get('/api/recipes/?limit=2&page=3')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(response.data['count'], 6)
+        response = self.client.get('/api/recipes/?limit=2&page=4')
+        self.assertEqual(response.status_code, 404)
+
+    def test_subscriptions_added_after_estimated_count(self):
+        authors = [
+            CustomUser.objects.create_user(
+                username=f'author{i}', email=f'author{i}@foodgram.ru',
+                password='password'
+            )
+            for i in range(6)
+        ]
+        for author in authors[:3]:
+            Subscription.objects.create(
+                subscriber=self.user, subscribing=author
+            )
+        self.client.get('/api/users/subscriptions/?limit=2')
+        for author in authors[3:]:
+            Subscription.objects.create(
+                subscriber=self.user, subscribing=author
+            )
+        response = self.client.get(
+            '/api/users/subscriptions/', {'limit': 2, 'page': 3}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_users_added_after_estimated_count(self):
+        response = self.client.get('/api/users/?limit=1')
+        self.assertEqual(response.data['count'], 2)
+        for i in range(2):
+            CustomUser.objects.create_user(
+                username=f'new{i}', email=f'new{i}@foodgram.ru',
+                password='password'
+            )
+        response = self.client.get('/api/users/?limit=1&page=4')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+
+    def test_invalid_pages(self):
+        self.create_recipes(1)
+        for page in ('0', '-1', 'abc', '2'):
+            with self.subTest(page=page):
+                response = self.client.get(
+                    '/api/recipes/', {'limit': 2, 'page': page}
+                )
+                self.assertEqual(response.status_code, 404)
+        response = self.client.get('/api/recipes/?limit=2&page=1')
+        self.assertEqual(response.status_code, 200)
+
+
+class CursorOrderingTest(FoodgramTestCase):
+    """Сортировки, допустимые при пагинации по курсору."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipes = cls.create_recipes(5)
+
+    def walk(self, params):
+        ids, url = [], '/api/recipes/'
+        response = self.client.get(url, {'cursor': '', 'limit': 2, **params})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids.extend(recipe['id'] for recipe in response.data['results'])
+            if not response.data['next']:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def test_created_orderings(self):
+        ids = [recipe.pk for recipe in self.recipes]
+        self.assertEqual(self.walk({}), ids)
+        self.assertEqual(self.walk({'ordering': 'created'}), ids)
+        self.assertEqual(self.walk({'ordering': '-created'}), ids[::-1])
+
+    def test_other_orderings_rejected(self):
+        for ordering in ('bogus', '-favorites_count', 'name'):
+            with self.subTest(ordering=ordering):
+                response = self.client.get(
+                    '/api/recipes/', {'cursor': '', 'ordering': ordering}
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('ordering', response.data)
+        response = self.client.get(
+            '/api/recipes/', {'limit': 2, 'ordering': '-favorites_count'}
+        )
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,119 @@
+from django.core.cache import cache
+
+from api.tests.base import FoodgramTestCase
+from recipes.models import FavoriteRecipe, ShoppingCart
+from users.models import Subscription
+
+
+class RecipeQueriesTest(FoodgramTestCase):
+    """Постоянное количество запросов к БД в списке и карточке рецепта."""
+    PAGE_SIZES = (1, 6, 50)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipes = cls.create_recipes(50)
+        Subscription.objects.create(
+            subscriber=cls.user, subscribing=cls.author
+        )
+        FavoriteRecipe.objects.create(user=cls.user, recipe=cls.recipes[0])
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipes[1])
+
+    def assert_list_queries(self, client, num):
+        for limit in self.PAGE_SIZES:
+            with self.subTest(limit=limit):
+                cache.clear()
+                with self.assertNumQueries(num):
+                    response = client.get(f'/api/recipes/?limit={limit}')
+                self.assertEqual(len(response.data['results']), limit)
+
+    def test_list_anonymous(self):
+        # count, страница, авторы, теги, ингредиенты
+        self.assert_list_queries(self.anonymous, 5)
+
+    def test_list_authenticated(self):
+        # токен, count, страница, авторы, теги, ингредиенты
+        self.assert_list_queries(self.client, 6)
+
+    def test_list_cached_fragments(self):
+        for limit in self.PAGE_SIZES:
+            with self.subTest(limit=limit):
+                self.client.get(f'/api/recipes/?limit={limit}')
+                # count и данные рецептов берутся из кеша
+                with self.assertNumQueries(1):
+                    self.client.get(f'/api/recipes/?limit={limit}')
+
+    def test_retrieve(self):
+        for recipe in self.recipes[:3]:
+            with self.subTest(recipe=recipe.pk):
+                cache.clear()
+                with self.assertNumQueries(5):
+                    response = self.client.get(f'/api/recipes/{recipe.pk}/')
+                self.assertEqual(len(response.data['ingredients']), 3)
+
+    def test_user_flags(self):
+        response = self.client.get('/api/recipes/?limit=50')
+        recipes = {
+            recipe['id']: recipe for recipe in response.data['results']
+        }
+        self.assertTrue(recipes[self.recipes[0].pk]['is_favorited'])
+        self.assertFalse(recipes[self.recipes[0].pk]['is_in_shopping_cart'])
+        self.assertTrue(recipes[self.recipes[1].pk]['is_in_shopping_cart'])
+        self.assertTrue(
+            all(
+                recipe['author']['is_subscribed']
+                for recipe in recipes.values()
+            )
+        )
+        response = self.anonymous.get('/api/recipes/?limit=50')
+        self.assertFalse(
+            any(
+                recipe['is_favorited'] or recipe['author']['is_subscribed']
+                for recipe in response.data['results']
+            )
+        )
+
+
+class RecipeCacheTest(FoodgramTestCase):
+    """Кеш данных рецепта сбрасывается при изменении связанных записей."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipe, cls.other = cls.create_recipes(2)
+
+    def get_recipe(self, recipe):
+        return self.client.get(f'/api/recipes/{recipe.pk}/').data
+
+    def test_ingredient_changes(self):
+        self.get_recipe(self.recipe)
+        entry = self.recipe.recipe_to_ingredient.first()
+        entry.ingredient = self.ingredients[-1]
+        entry.amount = 99
+        entry.save()
+        self.assertIn(
+            (self.ingredients[-1].pk, 99),
+            [
+                (ingredient['id'], ingredient['amount'])
+                for ingredient in self.get_recipe(self.recipe)['ingredients']
+            ]
+        )
+        self.get_recipe(self.other)
+        entry.recipe = self.other
+        entry.save()
+        self.assertEqual(len(self.get_recipe(self.recipe)['ingredients']), 2)
+        self.assertEqual(len(self.get_recipe(self.other)['ingredients']), 4)
+        entry.delete()
+        self.assertEqual(len(self.get_recipe(self.other)['ingredients']), 3)
+
+    def test_tag_changes(self):
+        self.get_recipe(self.recipe)
+        entry = self.recipe.recipe_to_tag.get()
+        entry.tag = self.tags[2]
+        entry.save()
+        self.assertEqual(
+            [tag['id'] for tag in self.get_recipe(self.recipe)['tags']],
+            [self.tags[2].pk]
+        )
+        entry.delete()
+        self.assertEqual(self.get_recipe(self.recipe)['tags'], [])
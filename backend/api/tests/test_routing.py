@@ -0,0 +1,144 @@
+import os
+import tempfile
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connections, router
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.routers import REPLICA_ALIAS, read_from_replica
+from api.tests.base import MEDIA_ROOT, PNG
+from recipes.models import Recipe, Tag
+from users.models import CustomUser
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ReplicaRoutingTest(TransactionTestCase):
+    """
+    Маршрутизация запросов между основной базой и репликой. Реплику
+    заменяет отдельный файл SQLite со схемой из моделей: изменения
+    в него не копируются, как у сильно отстающей реплики.
+    """
+    @classmethod
+    def setUpClass(cls):
+        '''
+        Реплика подключается после настройки тестовой базы: раннер создаёт
+        тестовые базы только для псевдонимов из настроек.
+        '''
+        super().setUpClass()
+        cls.replica_file = tempfile.NamedTemporaryFile(
+            suffix='.sqlite3', delete=False
+        ).name
+        connections.settings[REPLICA_ALIAS] = {
+            **connections.settings['default'],
+            'NAME': cls.replica_file,
+        }
+        with connections[REPLICA_ALIAS].schema_editor() as editor:
+            for model in apps.get_models():
+                if model._meta.managed and not model._meta.proxy:
+                    editor.create_model(model)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA_ALIAS].close()
+        del connections[REPLICA_ALIAS]
+        del connections.settings[REPLICA_ALIAS]
+        os.remove(cls.replica_file)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            username='user', email='user@foodgram.ru', password='password'
+        )
+        self.tag = Tag.objects.create(
+            name='Завтрак', color='#FF0000', slug='breakfast'
+        )
+        self.recipe = Recipe.objects.create(
+            author=self.user, name='Омлет', text='Описание',
+            cooking_time=10, image=ContentFile(PNG, name='recipe.png')
+        )
+        self.recipe.tags.add(self.tag)
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user)}'
+        )
+        self.anonymous = APIClient()
+
+    def tearDown(self):
+        replica = connections[REPLICA_ALIAS]
+        with replica.constraint_checks_disabled(), replica.cursor() as cursor:
+            for table in replica.introspection.table_names(cursor):
+                cursor.execute(f'DELETE FROM {replica.ops.quote_name(table)}')
+        super().tearDown()
+
+    def request(self, client, method, path):
+        '''Запрос и SQL-запросы, выполненные в каждой из баз.'''
+        with CaptureQueriesContext(connections['default']) as default, \
+                CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica:
+            response = getattr(client, method)(path)
+        return response, len(default), len(replica)
+
+    def test_safe_methods_read_replica(self):
+        for method in ('get', 'head'):
+            with self.subTest(method=method):
+                response, default, replica = self.request(
+                    self.anonymous, method, '/api/recipes/?limit=6'
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(default, 0)
+                self.assertGreater(replica, 0)
+        self.assertEqual(
+            self.anonymous.get('/api/recipes/?limit=6').data['results'], []
+        )
+
+    def test_pinned_to_default_after_write(self):
+        token = read_from_replica.set(True)
+        try:
+            self.assertEqual(router.db_for_read(Recipe), REPLICA_ALIAS)
+            Tag.objects.create(name='Ужин', color='#0000FF', slug='dinner')
+            self.assertEqual(router.db_for_read(Recipe), 'default')
+            self.assertTrue(Tag.objects.filter(slug='dinner').exists())
+        finally:
+            read_from_replica.reset(token)
+
+    def test_writes_skip_replica(self):
+        for method in ('post', 'delete'):
+            with self.subTest(method=method):
+                response, default, replica = self.request(
+                    self.client, method,
+                    f'/api/recipes/{self.recipe.pk}/favorite/'
+                )
+                self.assertIn(response.status_code, (201, 204))
+                self.assertGreater(default, 0)
+                self.assertEqual(replica, 0)
+
+    def test_cache_filled_from_default(self):
+        CustomUser.objects.using(REPLICA_ALIAS).bulk_create([self.user])
+        Recipe.objects.using(REPLICA_ALIAS).bulk_create([
+            Recipe(
+                pk=self.recipe.pk, author_id=self.user.pk, name='Старое',
+                text='Старое', cooking_time=1, image=self.recipe.image.name
+            )
+        ])
+        response = self.anonymous.get(f'/api/recipes/{self.recipe.pk}/')
+        self.assertEqual(response.data['name'], 'Омлет')
+        self.assertEqual(
+            [tag['slug'] for tag in response.data['tags']], ['breakfast']
+        )
+        response = self.anonymous.get('/api/tags/')
+        self.assertEqual(
+            [tag['slug'] for tag in response.data], ['breakfast']
+        )
+
+    def test_migrations_only_on_default(self):
+        for model in apps.get_models():
+            with self.subTest(model=model.__name__):
+                self.assertTrue(router.allow_migrate_model('default', model))
+                self.assertFalse(
+                    router.allow_migrate_model(REPLICA_ALIAS, model)
+                )
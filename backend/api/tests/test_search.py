@@ -0,0 +1,89 @@
+from unittest import skipUnless
+
+from django.core.files.base import ContentFile
+from django.db import connection
+
+from api.tests.base import PNG, FoodgramTestCase
+from recipes.models import FavoriteRecipe, Recipe, TagToRecipe
+from recipes.search import SEARCH_TABLE
+
+
+class RecipeSearchTest(FoodgramTestCase):
+    """
+    Полнотекстовый поиск рецептов (параметр search): ранжирование,
+    сочетание с фильтрами и синхронизация поисковых данных сигналами.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.in_text = cls.create_recipe('Суп', 'Суп с грибами и луком')
+        cls.in_name = cls.create_recipe('Грибы жареные', 'Жарить 10 минут')
+        cls.other = cls.create_recipe('Омлет', 'Яйца и молоко')
+        cls.by_user = cls.create_recipe(
+            'Грибы маринованные', 'Грибы, уксус', author=cls.user
+        )
+        TagToRecipe.objects.create(recipe=cls.in_name, tag=cls.tags[0])
+        FavoriteRecipe.objects.create(user=cls.user, recipe=cls.in_text)
+
+    @classmethod
+    def create_recipe(cls, name, text, author=None):
+        return Recipe.objects.create(
+            author=author or cls.author, name=name, text=text,
+            cooking_time=10, image=ContentFile(PNG, name='recipe.png')
+        )
+
+    def search(self, query):
+        response = self.client.get(
+            f'/api/recipes/?limit=10&search={query}'
+        )
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_ranking(self):
+        self.assertEqual(
+            self.search('гриб'),
+            [self.by_user.pk, self.in_name.pk, self.in_text.pk]
+        )
+
+    def test_filters(self):
+        for query, expected in (
+            (f'гриб&tags={self.tags[0].slug}', [self.in_name.pk]),
+            (f'гриб&author={self.user.pk}', [self.by_user.pk]),
+            ('гриб&is_favorited=1', [self.in_text.pk]),
+            ('омлет&is_favorited=1', []),
+        ):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), expected)
+
+    def test_sync(self):
+        self.other.name = 'Омлет с грибами'
+        self.other.save()
+        self.assertIn(self.other.pk, self.search('гриб'))
+        self.in_name.text = 'Жарить на сливочном масле'
+        self.in_name.name = 'Картофель жареный'
+        self.in_name.save(update_fields=('name', 'text'))
+        self.assertNotIn(self.in_name.pk, self.search('гриб'))
+        self.assertEqual(self.search('картофель'), [self.in_name.pk])
+        response = self.client.delete(f'/api/recipes/{self.by_user.pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertNotIn(self.by_user.pk, self.search('гриб'))
+
+    @skipUnless(connection.vendor == 'sqlite', 'FTS5 есть только в SQLite')
+    def test_fts_rows(self):
+        def rowids():
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT rowid FROM {SEARCH_TABLE}')
+                return {row[0] for row in cursor.fetchall()}
+
+        self.assertEqual(
+            rowids(), set(Recipe.objects.values_list('pk', flat=True))
+        )
+        self.other.delete()
+        Recipe.objects.filter(pk=self.in_name.pk).delete()
+        self.assertEqual(rowids(), {self.in_text.pk, self.by_user.pk})
+
+    def test_punctuation(self):
+        for query in ('!!!', '"', '*', '-+', '%22%2A'):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), [])
@@ -0,0 +1,190 @@
+import json
+from collections import Counter
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from api.tests.base import FoodgramTestCase
+from recipes.models import (IngredientToRecipe, Recipe, ShoppingCart,
+                            ShoppingListItem)
+
+
+class ShoppingListTest(FoodgramTestCase):
+    """Итоговые количества ингредиентов в выгрузке списка покупок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipes = cls.create_recipes(200)
+
+    def add_to_cart(self, recipes):
+        ids = [recipe.pk for recipe in recipes]
+        for start in range(0, len(ids), settings.BULK_RECIPES_LIMIT):
+            response = self.client.post(
+                '/api/recipes/shopping_cart/',
+                {'recipes': ids[start:start + settings.BULK_RECIPES_LIMIT]},
+                format='json'
+            )
+            self.assertEqual(response.status_code, 201)
+
+    def expected(self, recipes):
+        totals = Counter()
+        for name, unit, amount in IngredientToRecipe.objects.filter(
+            recipe__in=recipes
+        ).values_list(
+            'ingredient__name', 'ingredient__measurement_unit', 'amount'
+        ):
+            totals[name, unit] += amount
+        return [
+            {'name': name, 'measurement_unit': unit, 'amount': amount}
+            for (name, unit), amount in sorted(totals.items())
+        ]
+
+    def download(self, file_format='json'):
+        response = self.client.get(
+            '/api/recipes/download_shopping_cart/', {'format': file_format}
+        )
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_totals(self):
+        for size in (1, 200):
+            with self.subTest(size=size):
+                self.client.delete('/api/recipes/shopping_cart/clear/')
+                self.add_to_cart(self.recipes[:size])
+                self.assertEqual(
+                    json.loads(self.download()),
+                    self.expected(self.recipes[:size])
+                )
+
+    def test_queries(self):
+        self.download()
+        for size in (1, 200):
+            with self.subTest(size=size):
+                self.client.delete('/api/recipes/shopping_cart/clear/')
+                self.add_to_cart(self.recipes[:size])
+                # токен берётся из кеша: только строки списка покупок
+                with self.assertNumQueries(1):
+                    self.download()
+
+    def test_pdf(self):
+        self.add_to_cart(self.recipes)
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            b''.join(response.streaming_content).startswith(b'%PDF')
+        )
+
+
+class ShoppingListSignalsTest(FoodgramTestCase):
+    """
+    Таблица списков покупок остаётся согласованной с корзинами при
+    изменениях не через API: в админке, каскадных удалениях и т. п.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipes = cls.create_recipes(3)
+
+    def setUp(self):
+        super().setUp()
+        for recipe in self.recipes[:2]:
+            self.client.post(f'/api/recipes/{recipe.pk}/shopping_cart/')
+        ShoppingCart.objects.create(user=self.author, recipe=self.recipes[1])
+
+    def assert_consistent(self):
+        call_command('rebuild_shopping_lists', '--verify', stdout=StringIO())
+
+    def test_recipe_ingredient_changes(self):
+        entry = self.recipes[0].recipe_to_ingredient.first()
+        entry.amount += 10
+        entry.save()
+        self.assert_consistent()
+        entry.ingredient = self.ingredients[-1]
+        entry.save()
+        self.assert_consistent()
+        entry.recipe = self.recipes[1]
+        entry.save()
+        self.assert_consistent()
+        IngredientToRecipe.objects.create(
+            recipe=self.recipes[0], ingredient=self.ingredients[-2], amount=5
+        )
+        self.assert_consistent()
+        entry.delete()
+        self.assert_consistent()
+        self.recipes[1].recipe_to_ingredient.all().delete()
+        self.assert_consistent()
+
+    def test_cart_changes(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipes[2])
+        self.assert_consistent()
+        ShoppingCart.objects.get(
+            user=self.user, recipe=self.recipes[0]
+        ).delete()
+        self.assert_consistent()
+
+    def test_cart_entry_moved(self):
+        entry = ShoppingCart.objects.get(user=self.author)
+        entry.recipe = self.recipes[0]
+        entry.save()
+        self.assert_consistent()
+        ShoppingCart.objects.filter(user=self.user).delete()
+        self.assert_consistent()
+        self.assertFalse(ShoppingListItem.objects.filter(user=self.user))
+
+    def test_cascade_deletes(self):
+        self.recipes[0].delete()
+        self.assert_consistent()
+        self.ingredients[2].delete()
+        self.assert_consistent()
+        Recipe.objects.filter(pk=self.recipes[2].pk).delete()
+        self.assert_consistent()
+        self.author.delete()
+        self.assert_consistent()
+        self.assertFalse(ShoppingListItem.objects.filter(user=self.user))
+
+    def test_recipe_destroy_through_api(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        response = client.delete(f'/api/recipes/{self.recipes[1].pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assert_consistent()
+
+
+class DoubleSubmitTest(FoodgramTestCase):
+    """Повторные запросы не меняют счётчик "Избранного" и список покупок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipe = cls.create_recipes(1)[0]
+
+    def test_favorite(self):
+        url = f'/api/recipes/{self.recipe.pk}/favorite/'
+        statuses = [self.client.post(url).status_code for _ in range(2)]
+        self.assertEqual(statuses, [201, 400])
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 1)
+        statuses = [self.client.delete(url).status_code for _ in range(2)]
+        self.assertEqual(statuses, [204, 400])
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 0)
+
+    def test_shopping_cart(self):
+        url = f'/api/recipes/{self.recipe.pk}/shopping_cart/'
+        statuses = [self.client.post(url).status_code for _ in range(2)]
+        self.assertEqual(statuses, [201, 400])
+        self.assertEqual(
+            sorted(
+                ShoppingListItem.objects.filter(
+                    user=self.user
+                ).values_list('total_amount', flat=True)
+            ),
+            [1, 2, 3]
+        )
+        statuses = [self.client.delete(url).status_code for _ in range(2)]
+        self.assertEqual(statuses, [204, 400])
+        self.assertFalse(ShoppingListItem.objects.filter(user=self.user))
@@ -0,0 +1,65 @@
+import csv
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+
+from api.tests.base import IMAGE, FoodgramTestCase
+from recipes.models import Recipe
+from users.models import CustomUser, Subscription
+
+
+class UploadTest(FoodgramTestCase):
+    """
+    Загрузка тегов и рецептов командой upload обновляет метку версии
+    тегов, счётчики и ленты подписчиков.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.base_dir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.base_dir, 'data'))
+        self.addCleanup(shutil.rmtree, self.base_dir)
+
+    def upload(self, filename, rows):
+        with open(
+            os.path.join(self.base_dir, 'data', filename), 'w',
+            encoding='utf-8', newline=''
+        ) as file:
+            csv.writer(file).writerows(rows)
+        with self.settings(BASE_DIR=self.base_dir):
+            call_command('upload', filename, stdout=StringIO())
+
+    def test_tags(self):
+        self.assertEqual(len(self.anonymous.get('/api/tags/').data), 3)
+        self.upload('tags.csv', [('Ужин', '#000000', 'dinner')])
+        self.assertIn(
+            'dinner',
+            [tag['slug'] for tag in self.anonymous.get('/api/tags/').data]
+        )
+
+    @override_settings(FEED_PRECOMPUTE=True)
+    def test_recipes(self):
+        author = CustomUser.objects.create_user(
+            username='vasya.pupkin', email='vasya@yandex.ru',
+            password='password'
+        )
+        Subscription.objects.create(subscriber=self.user, subscribing=author)
+        ingredients = ['1', '100', '2', '200'] + ['нет'] * 18
+        tags = ['0', 'нет', 'нет']
+        self.upload('recipes.csv', [
+            ingredients + ['', ''] + tags + [IMAGE, f'Рецепт {number}',
+                                             'Описание', '10']
+            for number in range(2)
+        ])
+        self.assertEqual(Recipe.objects.filter(author=author).count(), 2)
+        author.refresh_from_db()
+        self.assertEqual(author.recipes_count, 2)
+        self.assertEqual(
+            len(self.client.get('/api/recipes/feed/').data['results']), 2
+        )
+        call_command('recount', '--verify', stdout=StringIO())
+        call_command('rebuild_feeds', '--verify', stdout=StringIO())
@@ -0,0 +1,69 @@
+from django.core.cache import cache
+
+from api.tests.base import FoodgramTestCase
+from users.models import CustomUser, Subscription
+
+
+class SubscriptionsTest(FoodgramTestCase):
+    """Список подписок и параметр recipes_limit."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.authors = [cls.author] + [
+            CustomUser.objects.create_user(
+                username=f'author{i}', email=f'author{i}@foodgram.ru',
+                password='password', first_name='Автор', last_name='Авторов'
+            )
+            for i in range(4)
+        ]
+        for number, author in enumerate(cls.authors):
+            cls.create_recipes(3, author=author, start=number * 3)
+            Subscription.objects.create(
+                subscriber=cls.user, subscribing=author
+            )
+
+    def test_recipes_limit(self):
+        response = self.client.get(
+            '/api/users/subscriptions/?limit=10&recipes_limit=2'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], len(self.authors))
+        for subscription in response.data['results']:
+            self.assertEqual(len(subscription['recipes']), 2)
+        response = self.client.get(
+            '/api/users/subscriptions/?limit=10&recipes_limit=0'
+        )
+        self.assertEqual(response.data['results'][0]['recipes'], [])
+
+    def test_invalid_recipes_limit(self):
+        for limit in ('abc', '-1', '1.5'):
+            with self.subTest(limit=limit):
+                response = self.client.get(
+                    f'/api/users/subscriptions/?limit=10&recipes_limit={limit}'
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('recipes_limit', response.data)
+        new_author = CustomUser.objects.create_user(
+            username='new', email='new@foodgram.ru', password='password'
+        )
+        response = self.client.post(
+            f'/api/users/{new_author.pk}/subscribe/?recipes_limit=abc'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(
+            Subscription.objects.filter(
+                subscriber=self.user, subscribing=new_author
+            ).exists()
+        )
+
+    def test_queries(self):
+        for limit in (1, 3):
+            with self.subTest(limit=limit):
+                cache.clear()
+                # токен, count, подписки, их рецепты
+                with self.assertNumQueries(4):
+                    self.client.get(
+                        '/api/users/subscriptions/',
+                        {'limit': 10, 'recipes_limit': limit}
+                    )
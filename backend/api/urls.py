@@ -1,28 +1,49 @@
+from django.conf import settings
 from django.urls import include, path
 from djoser.views import TokenCreateView, TokenDestroyView
 from rest_framework.routers import DefaultRouter
 
-from api.views import (CustomUserViewSet, IngredientViewSet, RecipeViewSet,
-                       ShoppingCardView, TagViewSet)
+from api.async_views import AsyncIngredientView, AsyncTagView
+from api.views import (CustomUserViewSet, IngredientViewSet, MetricsView,
+                       RecipeViewSet, ShoppingCardView, TagViewSet)
 
 
 router_api = DefaultRouter()
-router_api.register(r'users', CustomUserViewSet)
-router_api.register(r'ingredients', IngredientViewSet)
-router_api.register(r'recipes', RecipeViewSet)
-router_api.register(r'tags', TagViewSet)
+router_api.register(r'users', CustomUserViewSet, basename='users')
+router_api.register(r'ingredients', IngredientViewSet, basename='ingredients')
+router_api.register(r'recipes', RecipeViewSet, basename='recipes')
+router_api.register(r'tags', TagViewSet, basename='tags')
 
 auth_token_urls = [
     path('login/', TokenCreateView.as_view(), name='login'),
     path('logout/', TokenDestroyView.as_view(), name='logout')
 ]
 
+async_urls = [
+    path('api/tags/', AsyncTagView.as_view(), name='tags-list'),
+    path('api/tags/<int:pk>/', AsyncTagView.as_view(), name='tags-detail'),
+    path(
+        'api/ingredients/',
+        AsyncIngredientView.as_view(),
+        name='ingredients-list'
+    ),
+    path(
+        'api/ingredients/<int:pk>/',
+        AsyncIngredientView.as_view(),
+        name='ingredients-detail'
+    ),
+]
+
 urlpatterns = [
     path(
         'api/recipes/download_shopping_cart/',
         ShoppingCardView.as_view(),
         name='download_shopping_cart'
     ),
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
     path('api/', include(router_api.urls)),
     path('api/auth/token/', include(auth_token_urls)),
 ]
+
+if settings.SERVER_MODE == 'asgi':
+    urlpatterns = async_urls + urlpatterns
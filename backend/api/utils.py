@@ -1,19 +1,270 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Greatest
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
+from django.utils.translation import gettext_lazy as _
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
-from recipes.models import Recipe
+from recipes.models import (FavoriteRecipe, FeedEntry, IngredientToRecipe,
+                            Recipe, ShoppingCart, ShoppingListItem)
+from recipes.search import ingredient_index, search_ingredients
+from users.models import CustomUser, Subscription
+
+
+changes_in_batch = ContextVar('changes_in_batch', default=False)
+
+
+@contextmanager
+def batch_changes():
+    """
+    Пакетное изменение корзин, "Избранного" или ингредиентов рецептов:
+    списки покупок и счётчики обновляет вызывающий код одним пакетом,
+    а сигналы моделей их не изменяют.
+    """
+    token = changes_in_batch.set(True)
+    try:
+        yield
+    finally:
+        changes_in_batch.reset(token)
+
+
+def get_recipes_amounts(recipe_ids):
+    """Получение суммарного количества ингредиентов в рецептах."""
+    return dict(
+        IngredientToRecipe.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values(
+            'ingredient'
+        ).annotate(
+            total_amount=Sum('amount')
+        ).values_list('ingredient', 'total_amount')
+    )
+
+
+def lock_users(user_ids):
+    """
+    Блокировка строк пользователей до конца транзакции: изменения списков
+    одного пользователя выполняются по очереди. Строки блокируются
+    по порядку id, чтобы одновременные блокировки не приводили
+    к взаимоблокировке.
+    """
+    list(
+        CustomUser.objects.select_for_update().filter(
+            pk__in=user_ids
+        ).order_by('pk').values_list('pk', flat=True)
+    )
+
+
+@transaction.atomic
+def update_shopping_lists(user_ids, amounts):
+    """
+    Изменение количества ингредиентов в списках покупок пользователей.
+    amounts - словарь {id ингредиента: изменение количества}.
+    """
+    amounts = {
+        ingredient_id: amount
+        for ingredient_id, amount in amounts.items()
+        if amount
+    }
+    user_ids = set(user_ids)
+    if not user_ids or not amounts:
+        return
+    # select_for_update строк списка не защищает от одновременного
+    # добавления ещё не существующих строк
+    lock_users(user_ids)
+    items = {
+        (item.user_id, item.ingredient_id): item
+        for item in ShoppingListItem.objects.select_for_update().filter(
+            user_id__in=user_ids,
+            ingredient_id__in=amounts
+        )
+    }
+    to_create, to_update, to_delete = [], [], []
+    for user_id in user_ids:
+        for ingredient_id, amount in amounts.items():
+            item = items.get((user_id, ingredient_id))
+            if item is None:
+                if amount > 0:
+                    to_create.append(
+                        ShoppingListItem(
+                            user_id=user_id,
+                            ingredient_id=ingredient_id,
+                            total_amount=amount
+                        )
+                    )
+                continue
+            item.total_amount += amount
+            if item.total_amount > 0:
+                to_update.append(item)
+            else:
+                to_delete.append(item.pk)
+    ShoppingListItem.objects.bulk_create(to_create)
+    ShoppingListItem.objects.bulk_update(to_update, ('total_amount',))
+    ShoppingListItem.objects.filter(pk__in=to_delete).delete()
+
+
+def change_shopping_list(user_id, recipe_ids, sign=1):
+    """Добавление или вычитание ингредиентов рецептов в списке покупок."""
+    update_shopping_lists(
+        (user_id,),
+        {
+            ingredient_id: sign * amount
+            for ingredient_id, amount in get_recipes_amounts(
+                recipe_ids
+            ).items()
+        }
+    )
+
+
+def change_recipe_in_shopping_lists(recipe_id, amounts):
+    """
+    Изменение количества ингредиентов рецепта в списках покупок
+    всех пользователей, у которых рецепт в корзине.
+    """
+    update_shopping_lists(
+        ShoppingCart.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('user_id', flat=True),
+        amounts
+    )
+
+
+def change_counter(queryset, field, delta):
+    """
+    Изменение счётчика field у объектов queryset на delta одним запросом
+    UPDATE без чтения текущего значения. Счётчик не опускается ниже нуля.
+    """
+    return queryset.update(**{field: Greatest(F(field) + delta, Value(0))})
+
+
+def change_favorites_count(model, recipe_ids, delta):
+    """Изменение счётчика добавлений в "Избранное" у рецептов."""
+    if model is FavoriteRecipe and recipe_ids:
+        change_counter(
+            Recipe.objects.filter(pk__in=recipe_ids), 'favorites_count', delta
+        )
+
+
+def add_to_feeds(recipe):
+    """Добавление нового рецепта в предрассчитанные ленты подписчиков."""
+    if not settings.FEED_PRECOMPUTE:
+        return
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, recipe=recipe, created=recipe.created)
+            for user_id in Subscription.objects.filter(
+                subscribing=recipe.author_id
+            ).values_list('subscriber_id', flat=True)
+        ),
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+
+
+def follow_feed(user_id, author_id):
+    """Добавление рецептов автора в ленту нового подписчика."""
+    if not settings.FEED_PRECOMPUTE:
+        return
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, recipe_id=recipe_id, created=created)
+            for recipe_id, created in Recipe.objects.filter(
+                author_id=author_id
+            ).values_list('pk', 'created')
+        ),
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+
+
+def unfollow_feed(user_id, author_id):
+    """Удаление рецептов автора из ленты бывшего подписчика."""
+    if settings.FEED_PRECOMPUTE:
+        FeedEntry.objects.filter(
+            user_id=user_id, recipe__author_id=author_id
+        ).delete()
+
+
+def get_recipes_limit(request):
+    """
+    Разбор параметра recipes_limit: неотрицательное целое число или None,
+    если параметр не передан.
+    """
+    limit = request.query_params.get('recipes_limit')
+    if not limit:
+        return None
+    try:
+        limit = int(limit)
+    except ValueError:
+        limit = -1
+    if limit < 0:
+        raise ValidationError(
+            {'recipes_limit': _('Ожидается неотрицательное целое число.')}
+        )
+    return limit
+
+
+def get_catalogue_cache(request, version_key, version):
+    """
+    ETag ответа справочника и ключ кеша его данных для метки версии
+    данных version.
+    """
+    return (
+        f'"{version_key}-{version}"',
+        f'{version_key}:{version}:{request.get_full_path()}'
+    )
+
+
+def is_not_modified(request, etag):
+    """Ответ с этим ETag уже есть у клиента."""
+    return etag in parse_etags(request.headers.get('If-None-Match', ''))
+
+
+def find_ingredients(query_params):
+    """
+    Поиск ингредиентов по параметрам запроса. Параметр search включает
+    ранжированный поиск с учётом опечаток, количество результатов
+    ограничивается параметром limit. Поиск только по началу названия
+    (name) выполняется по индексу в памяти. Для других параметров
+    возвращается None: список строится фильтрами вьюсета.
+    """
+    search = query_params.get('search')
+    if search:
+        limit = query_params.get('limit', '')
+        return search_ingredients(
+            search,
+            min(
+                int(limit) if limit.isdigit() else
+                settings.INGREDIENT_SEARCH_LIMIT,
+                settings.INGREDIENT_SEARCH_LIMIT
+            )
+        )
+    name = query_params.get('name')
+    if name and not query_params.keys() - {'name'}:
+        return ingredient_index.startswith(name)
+    return None
 
 
 def post(request, pk, model, serializer):
     """Обработка POST-запроса для списков "Избранное" или списков покупок."""
     recipe = get_object_or_404(Recipe, pk=pk)
-    if model.objects.filter(user=request.user, recipe=recipe).exists():
+    with transaction.atomic():
+        lock_users((request.user.pk,))
+        _, created = model.objects.get_or_create(
+            user=request.user, recipe=recipe
+        )
+    if not created:
         return Response(
             {'errors': 'Рецепт уже в списке "Избранное" или списке покупок'},
             status=status.HTTP_400_BAD_REQUEST,
         )
-    model.objects.get_or_create(user=request.user, recipe=recipe)
     serializer = serializer(
         instance=recipe,
         context={'request': request}
@@ -24,15 +275,114 @@ def post(request, pk, model, serializer):
 def delete(request, pk, model):
     """Обработка DELETE-запроса для списков "Избранное" или списков покупок."""
     recipe = get_object_or_404(Recipe, pk=pk)
-    if model.objects.filter(user=request.user, recipe=recipe).exists():
-        obj = get_object_or_404(
-            klass=model,
-            user=request.user,
-            recipe=recipe
-        )
-        obj.delete()
+    with transaction.atomic():
+        lock_users((request.user.pk,))
+        deleted, _ = model.objects.filter(
+            user=request.user, recipe=recipe
+        ).delete()
+    if deleted:
         return Response(status=status.HTTP_204_NO_CONTENT)
     return Response(
         {'errors': 'Рецепта нет в списке "Избранное" или списке покупок'},
         status=status.HTTP_400_BAD_REQUEST
     )
+
+
+def get_bulk_ids(request, serializer):
+    """
+    Разбор списка id рецептов пакетного запроса.
+    Возвращает список id и множество существующих рецептов.
+    """
+    serializer = serializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    recipe_ids = serializer.validated_data['recipes']
+    found = set(
+        Recipe.objects.filter(pk__in=recipe_ids).values_list('id', flat=True)
+    )
+    return recipe_ids, found
+
+
+def get_in_list(user, model, recipe_ids):
+    """
+    Блокировка пользователя и получение множества рецептов из recipe_ids,
+    уже находящихся в его списке. Вызывается внутри транзакции: до её
+    конца список пользователя не изменят другие запросы.
+    """
+    lock_users((user.pk,))
+    return set(
+        model.objects.filter(
+            user=user,
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', flat=True)
+    )
+
+
+def bulk_post(request, model, serializer):
+    """
+    Пакетное добавление рецептов в "Избранное" или список покупок.
+    bulk_create не отправляет сигналы моделей, поэтому список покупок
+    и счётчики обновляются здесь одним пакетом.
+    """
+    recipe_ids, found = get_bulk_ids(request, serializer)
+    with transaction.atomic():
+        in_list = get_in_list(request.user, model, found)
+        added = found - in_list
+        model.objects.bulk_create(
+            model(user=request.user, recipe_id=pk) for pk in added
+        )
+        change_favorites_count(model, added, 1)
+        if model is ShoppingCart:
+            change_shopping_list(request.user.id, added)
+    results = [
+        {
+            'id': pk,
+            'status': (
+                'added' if pk in added
+                else 'exists' if pk in in_list
+                else 'not_found'
+            )
+        }
+        for pk in recipe_ids
+    ]
+    return Response(
+        {'recipes': results},
+        status=status.HTTP_201_CREATED if added else status.HTTP_200_OK
+    )
+
+
+def bulk_delete(request, model, serializer):
+    """Пакетное удаление рецептов из "Избранного" или списка покупок."""
+    recipe_ids, found = get_bulk_ids(request, serializer)
+    with transaction.atomic(), batch_changes():
+        in_list = get_in_list(request.user, model, found)
+        model.objects.filter(
+            user=request.user,
+            recipe_id__in=in_list
+        ).delete()
+        change_favorites_count(model, in_list, -1)
+        if model is ShoppingCart:
+            change_shopping_list(request.user.id, in_list, sign=-1)
+    results = [
+        {
+            'id': pk,
+            'status': (
+                'deleted' if pk in in_list
+                else 'missing' if pk in found
+                else 'not_found'
+            )
+        }
+        for pk in recipe_ids
+    ]
+    return Response({'recipes': results}, status=status.HTTP_200_OK)
+
+
+@transaction.atomic
+def clear_shopping_cart(user):
+    """Очистка списка покупок пользователя с возвратом id его рецептов."""
+    lock_users((user.pk,))
+    cart = ShoppingCart.objects.filter(user=user)
+    recipe_ids = list(cart.values_list('recipe_id', flat=True))
+    with batch_changes():
+        cart.delete()
+    ShoppingListItem.objects.filter(user=user).delete()
+    return recipe_ids
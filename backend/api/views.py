@@ -1,32 +1,37 @@
-import io
-
-from django.db.models import Sum
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Prefetch, Subquery, Value
 from django_filters.rest_framework import DjangoFilterBackend
-from django.http import FileResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext_lazy as _
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from api.metrics import registry
+from api.mixins import VersionedCacheMixin
 from api.permissions import (IsAdminPermission,
                              IsAdminOrAuthorOrReadOnlyPermission)
-from api.pagination import PageLimitPagination
+from api.pagination import (FeedCursorPagination, PageLimitPagination,
+                            PageOrCursorPagination)
 from api.serializers import (IngredientSerializer, RecipeCreateSerializer,
-                             RecipeReadSerializer, RecipeShortReadSerializer,
+                             RecipeIdsSerializer, RecipeReadSerializer,
+                             RecipeShortReadSerializer,
                              SetPasswordSerializer, SignUpUserSerializer,
                              SubscriptionSerializer, TagSerializer,
                              UserProfileSerializer)
 from api.filters import IngredientFilter, RecipeFilter
-from api.utils import post, delete
+from api.shopping_list import STREAMING_FORMATS, render_pdf
+from api.utils import (bulk_delete, bulk_post, clear_shopping_cart, delete,
+                       find_ingredients, get_recipes_limit, post)
 from recipes.models import (FavoriteRecipe, Ingredient, Recipe, ShoppingCart,
-                            Tag)
+                            ShoppingListItem, Tag)
+from recipes.versions import INGREDIENTS_VERSION_KEY, TAGS_VERSION_KEY
 from users.models import CustomUser, Subscription
 
 
@@ -45,7 +50,10 @@ class CustomUserViewSet(
     """
     queryset = CustomUser.objects.all()
     pagination_class = PageLimitPagination
+    pagination_count_strategy = 'estimated'
     permission_classes = (AllowAny,)
+    filter_backends = (OrderingFilter,)
+    ordering_fields = ('username', 'recipes_count', 'subscribers_count')
 
     def get_serializer_class(self):
         '''Выбор сериализатора в зависимости от запроса.'''
@@ -91,12 +99,27 @@ class CustomUserViewSet(
     @action(
         detail=False,
         url_path='subscriptions',
+        url_name='subscriptions',
         permission_classes=(IsAuthenticated,)
     )
     def get_subscriptions(self, request):
         """Получение списка всех подписок пользователя"""
+        recipes = Recipe.objects.all()
+        limit = get_recipes_limit(request)
+        if limit is not None:
+            recipes = recipes.filter(
+                pk__in=Subquery(
+                    Recipe.objects.filter(
+                        author=OuterRef('author')
+                    ).values('pk')[:limit]
+                )
+            )
         subscriptions = CustomUser.objects.filter(
             subscribing__subscriber=request.user
+        ).annotate(
+            is_subscribed=Value(True)
+        ).prefetch_related(
+            Prefetch('own_recipe', queryset=recipes, to_attr='limited_recipes')
         )
         page = self.paginate_queryset(subscriptions)
         serializer = SubscriptionSerializer(
@@ -117,6 +140,8 @@ class CustomUserViewSet(
         subscriber = CustomUser.objects.get(pk=request.user.id)
         subscribing = get_object_or_404(CustomUser, pk=pk)
         if request.method == 'POST':
+            # recipes_limit проверяется до создания подписки
+            get_recipes_limit(request)
             if subscriber == subscribing:
                 raise ValidationError(
                     {'errors': _('Вы уже подписаны на данного пользователя.')}
@@ -128,24 +153,28 @@ class CustomUserViewSet(
                 raise ValidationError(
                     {'errors': _('Вы уже подписаны на данного пользователя.')}
                 )
-            Subscription.objects.create(
-                subscriber=subscriber,
-                subscribing=subscribing,
-            )
+            with transaction.atomic():
+                Subscription.objects.create(
+                    subscriber=subscriber,
+                    subscribing=subscribing,
+                )
+            subscribing.refresh_from_db(fields=('subscribers_count',))
             serializer = SubscriptionSerializer(
                 instance=subscribing,
                 context={'request': request}
             )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
-        get_object_or_404(
+        subscription = get_object_or_404(
             Subscription,
             subscriber=subscriber,
             subscribing=subscribing
-        ).delete()
+        )
+        with transaction.atomic():
+            subscription.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class IngredientViewSet(viewsets.ModelViewSet):
+class IngredientViewSet(VersionedCacheMixin, viewsets.ModelViewSet):
     """
     Вьюсет для реализации операций с моделью Ingredient:
     - получения списка всех ингредиентов;
@@ -156,11 +185,22 @@ class IngredientViewSet(viewsets.ModelViewSet):
     """
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
+    version_key = INGREDIENTS_VERSION_KEY
     permission_classes = (AllowAny,)
     pagination_class = None
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
 
+    def list(self, request, *args, **kwargs):
+        '''
+        Получение списка ингредиентов. Запросы с параметрами search и name
+        обслуживает поиск ингредиентов, остальные - фильтры вьюсета.
+        '''
+        ingredients = find_ingredients(request.query_params)
+        if ingredients is not None:
+            return Response(ingredients)
+        return super().list(request, *args, **kwargs)
+
     def get_permissions(self):
         """Выбор уровня доступа для пользователя в зависимости от запроса."""
         if self.action in ('create', 'update', 'destroy'):
@@ -176,18 +216,73 @@ class RecipeViewSet(viewsets.ModelViewSet):
     - создание нового рецепта;
     - обновление существующего рецепта;
     - удаление рецепта по его id.
+    Для списка рецептов доступна пагинация по курсору (параметр cursor)
+    и сортировка по дате или популярности (ordering=-favorites_count);
+    при пагинации по курсору - только по дате.
+    Лента рецептов авторов из подписок пользователя доступна по адресу
+    recipes/feed/.
     """
     queryset = Recipe.objects.all()
-    pagination_class = PageLimitPagination
-    filter_backends = (DjangoFilterBackend,)
+    pagination_class = PageOrCursorPagination
+    pagination_count_strategy = 'cached'
+    filter_backends = (DjangoFilterBackend, OrderingFilter)
     filterset_class = RecipeFilter
+    ordering_fields = ('created', 'favorites_count')
+
+    def get_queryset(self):
+        '''
+        Получение очереди рецептов с аннотированными полями is_favorited,
+        is_in_shopping_cart и author_is_subscribed для текущего пользователя.
+        Автор, теги и ингредиенты загружаются сериализатором только для
+        рецептов, которых нет в кеше.
+        '''
+        if self.action not in ('list', 'retrieve', 'feed'):
+            return Recipe.objects.all()
+        user = self.request.user
+        queryset = Recipe.objects.defer('search_vector')
+        if user.is_anonymous:
+            return queryset.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+                author_is_subscribed=Value(False)
+            )
+        return queryset.annotate(
+            is_favorited=Exists(
+                FavoriteRecipe.objects.filter(
+                    user=user,
+                    recipe=OuterRef('pk')
+                )
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(
+                    user=user,
+                    recipe=OuterRef('pk')
+                )
+            ),
+            author_is_subscribed=Value(True) if self.action == 'feed' else (
+                Exists(
+                    Subscription.objects.filter(
+                        subscriber=user,
+                        subscribing=OuterRef('author')
+                    )
+                )
+            )
+        )
 
     def get_serializer_class(self):
         '''Выбор сериализатора в зависимости от запроса.'''
-        if self.action in ('list', 'retrieve'):
+        if self.action in ('list', 'retrieve', 'feed'):
             return RecipeReadSerializer
         return RecipeCreateSerializer
 
+    @transaction.atomic
+    def perform_destroy(self, recipe):
+        '''
+        Удаление рецепта в одной транзакции с изменениями, которые
+        вносят сигналы: счётчиком рецептов автора и списками покупок.
+        '''
+        recipe.delete()
+
     def get_permissions(self):
         """Выбор уровня доступа для пользователя в зависимости от запроса."""
         if self.action in ('list', 'retrieve'):
@@ -196,6 +291,31 @@ class RecipeViewSet(viewsets.ModelViewSet):
             self.permission_classes = (IsAdminOrAuthorOrReadOnlyPermission,)
         return [permission() for permission in self.permission_classes]
 
+    @action(permission_classes=(IsAuthenticated,), detail=False)
+    def feed(self, request):
+        """
+        Лента рецептов авторов, на которых подписан пользователь,
+        с пагинацией по курсору: новые рецепты первыми.
+        """
+        paginator = FeedCursorPagination()
+        if settings.FEED_PRECOMPUTE:
+            queryset = self.get_queryset().filter(
+                feed_entries__user=request.user
+            ).annotate(feed_created=F('feed_entries__created'))
+            paginator.ordering = ('-feed_created',)
+        else:
+            queryset = self.get_queryset().filter(
+                Exists(
+                    Subscription.objects.filter(
+                        subscriber=request.user,
+                        subscribing=OuterRef('author')
+                    )
+                )
+            )
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     @action(
         methods=['post', 'delete'],
         permission_classes=(IsAuthenticated,),
@@ -218,70 +338,101 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return post(request, pk, ShoppingCart, RecipeShortReadSerializer)
         return delete(request, pk, ShoppingCart)
 
+    @action(
+        methods=['post', 'delete'],
+        permission_classes=(IsAuthenticated,),
+        detail=False,
+        url_path='favorite',
+        url_name='bulk-favorite'
+    )
+    def bulk_favorite(self, request):
+        """Пакетное добавление/удаление рецептов из "Избранного"."""
+        if request.method == 'POST':
+            return bulk_post(request, FavoriteRecipe, RecipeIdsSerializer)
+        return bulk_delete(request, FavoriteRecipe, RecipeIdsSerializer)
+
+    @action(
+        methods=['post', 'delete'],
+        permission_classes=(IsAuthenticated,),
+        detail=False,
+        url_path='shopping_cart',
+        url_name='bulk-shopping-cart'
+    )
+    def bulk_shopping_cart(self, request):
+        """Пакетное добавление/удаление рецептов из списка покупок."""
+        if request.method == 'POST':
+            return bulk_post(request, ShoppingCart, RecipeIdsSerializer)
+        return bulk_delete(request, ShoppingCart, RecipeIdsSerializer)
+
+    @action(
+        methods=['delete'],
+        permission_classes=(IsAuthenticated,),
+        detail=False,
+        url_path='shopping_cart/clear',
+        url_name='clear-shopping-cart'
+    )
+    def clear_cart(self, request):
+        """Очистка списка покупок текущего пользователя."""
+        recipe_ids = clear_shopping_cart(request.user)
+        return Response(
+            {
+                'recipes': [
+                    {'id': pk, 'status': 'deleted'} for pk in recipe_ids
+                ]
+            },
+            status=status.HTTP_200_OK
+        )
+
 
 @action(detail=False, permission_classes=(IsAuthenticated,))
 class ShoppingCardView(APIView):
-    """View-функция API для получения списка покупок в виде pdf-файла."""
+    """
+    View-функция API для получения списка покупок в виде файла.
+    Формат файла задаётся параметром format: pdf (по умолчанию), csv,
+    txt или json.
+    """
+    def perform_content_negotiation(self, request, force=False):
+        """Параметр format определяет формат файла, а не рендерер DRF."""
+        return super().perform_content_negotiation(request, force=True)
+
+    @staticmethod
+    def get_ingredients(user):
+        """
+        Получение суммарного количества каждого ингредиента
+        для рецептов из списка покупок пользователя.
+        """
+        return ShoppingListItem.objects.filter(user=user).values_list(
+            'ingredient__name',
+            'ingredient__measurement_unit',
+            'total_amount'
+        ).order_by('ingredient__name')
+
     def get(self, request):
-        """Обработка GET-запроса для получения списка покупок в виде pdf."""
-        recipes_in_shopping_list = Recipe.objects.filter(
-            recipe_on_shopping_cart__user=request.user
-        ).annotate(
-            sum_ingredients=Sum('recipe_to_ingredient__amount')
-        ).values_list(
-            'ingredients__name',
-            'ingredients__measurement_unit',
-            'sum_ingredients'
-        )
-        buffer = io.BytesIO()
-        pdf = canvas.Canvas(buffer)
-        pdfmetrics.registerFont(
-            TTFont(
-                name='Tantular',
-                filename='backend_static/fonts/Tantular.ttf',
-                asciiReadable='UTF-8'
-            )
-        )
-        font = 'Tantular'
-        x_position, y_position = 50, 800
-        pdf.setFont(font, 16)
-        if recipes_in_shopping_list:
-            indent = 30
-            pdf.drawString(
-                x=x_position,
-                y=y_position,
-                text='Ваш список ингредиентов для выбранных рецептов:'
-            )
-            for i, text in enumerate(recipes_in_shopping_list, start=1):
-                pdf.setFont(font, 14)
-                pdf.drawString(
-                    x=x_position,
-                    y=y_position - indent,
-                    text=f'{i}. {text[0].capitalize()} ({text[1]}) - {text[2]}'
-                )
-                y_position -= 15
-                if y_position <= 50:
-                    pdf.showPage()
-                    y_position = 800
-            pdf.save()
-            buffer.seek(0)
+        """Обработка GET-запроса для получения списка покупок."""
+        file_format = request.query_params.get('format', 'pdf')
+        ingredients = self.get_ingredients(request.user)
+        if file_format == 'pdf':
             return FileResponse(
-                buffer, as_attachment=True, filename='shopping_list.pdf'
+                render_pdf(ingredients),
+                as_attachment=True,
+                filename='shopping_list.pdf'
+            )
+        if file_format not in STREAMING_FORMATS:
+            raise ValidationError(
+                {'format': _('Неподдерживаемый формат списка покупок.')}
             )
-        pdf.setFont(font, 24)
-        pdf.drawString(
-            x_position,
-            y_position,
-            'Ваш список покупок пуст.'
+        stream, content_type = STREAMING_FORMATS[file_format]
+        response = StreamingHttpResponse(
+            stream(ingredients.iterator()),
+            content_type=f'{content_type}; charset=utf-8'
         )
-        pdf.save()
-        buffer.seek(0)
-        return FileResponse(
-            buffer, as_attachment=True, filename='shopping_list.pdf'
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_list.{file_format}"'
         )
+        return response
 
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(VersionedCacheMixin, viewsets.ModelViewSet):
     """
     Вьюсет для реализации операций с моделью Tag:
     - получения списка всех тегов;
@@ -292,6 +443,7 @@ class TagViewSet(viewsets.ModelViewSet):
     """
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    version_key = TAGS_VERSION_KEY
     pagination_class = None
     permission_classes = (AllowAny,)
 
@@ -300,3 +452,15 @@ class TagViewSet(viewsets.ModelViewSet):
         if self.action in ('create', 'update', 'destroy'):
             self.permission_classes = (IsAdminPermission,)
         return [permission() for permission in self.permission_classes]
+
+
+class MetricsView(APIView):
+    """View-функция API для выгрузки метрик запросов в формате Prometheus."""
+    permission_classes = (IsAdminPermission,)
+
+    def get(self, request):
+        """Обработка GET-запроса для получения метрик."""
+        return HttpResponse(
+            registry.render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
@@ -0,0 +1,118 @@
+"""
+Общие инструменты бенчмарков.
+Бенчмарки запускаются из каталога backend с теми же переменными
+окружения, что и manage.py, например:
+python -m benchmarks.ingredient_prefix
+Данные создаются во временной тестовой базе, рабочая база не меняется.
+"""
+import argparse
+import csv
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import (override_settings,  # noqa: E402
+                               setup_test_environment,
+                               teardown_test_environment)
+
+
+INGREDIENTS_CSV = os.path.join(settings.BASE_DIR, 'data', 'ingredients.csv')
+
+
+def get_parser(description):
+    """Парсер аргументов бенчмарка с общим параметром --repeat."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=200,
+        help='Количество повторов каждого измерения.'
+    )
+    return parser
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Временная тестовая база данных и каталог медиафайлов
+    на время бенчмарка.
+    """
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True
+    )
+    media_root = tempfile.mkdtemp()
+    try:
+        with override_settings(MEDIA_ROOT=media_root):
+            yield
+    finally:
+        shutil.rmtree(media_root, ignore_errors=True)
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def read_ingredients():
+    """Строки (название, единица измерения) из data/ingredients.csv."""
+    with open(INGREDIENTS_CSV, encoding='utf-8') as file:
+        return [tuple(row) for row in csv.reader(file)]
+
+
+def measure(function, arguments, repeat):
+    """
+    Время выполнения function(argument) в миллисекундах для каждого
+    аргумента, repeat проходов по списку аргументов.
+    """
+    timings = []
+    for _ in range(repeat):
+        for argument in arguments:
+            start = time.perf_counter()
+            function(argument)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def measure_memory(function):
+    """Время в миллисекундах и пиковый объём памяти в КиБ вызова function."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        function()
+        elapsed = (time.perf_counter() - start) * 1000
+        peak = tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def percentiles(timings):
+    """Медиана (p50) и 99-й перцентиль (p99) времени выполнения."""
+    cuts = statistics.quantiles(timings, n=100, method='inclusive')
+    return statistics.median(timings), cuts[98]
+
+
+def print_table(header, rows):
+    """Вывод результатов бенчмарка в виде таблицы."""
+    rows = [
+        [f'{value:.3f}' if isinstance(value, float) else str(value)
+         for value in row]
+        for row in rows
+    ]
+    widths = [
+        max(len(str(cell)) for cell in column)
+        for column in zip(header, *rows)
+    ]
+    for row in (header, *rows):
+        print('  '.join(
+            str(cell).rjust(width) for cell, width in zip(row, widths)
+        ))
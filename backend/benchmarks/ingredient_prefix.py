@@ -0,0 +1,65 @@
+"""
+Сравнение времени ответа на автодополнение названия ингредиента:
+индекс в памяти процесса (recipes.search.ingredient_index) и запрос
+istartswith через IngredientFilter.
+"""
+import random
+
+from benchmarks.common import (benchmark_database, get_parser, measure,
+                               percentiles, print_table, read_ingredients)
+
+from api.filters import IngredientFilter
+from recipes.models import Ingredient
+from recipes.search import ingredient_index
+
+
+def orm_startswith(prefix):
+    """Поиск по началу названия запросом к БД."""
+    return list(
+        IngredientFilter(
+            {'name': prefix}, queryset=Ingredient.objects.all()
+        ).qs.values('id', 'name', 'measurement_unit')
+    )
+
+
+def main():
+    parser = get_parser(__doc__)
+    parser.add_argument('--prefixes', type=int, default=50)
+    options = parser.parse_args()
+    rows = read_ingredients()
+    names = [name for name, _ in rows]
+    randomizer = random.Random(0)
+    prefixes = [
+        name[:randomizer.randint(1, 4)]
+        for name in randomizer.sample(names, options.prefixes)
+    ]
+    with benchmark_database():
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit=unit)
+            for name, unit in rows
+        )
+        # LIKE в SQLite не учитывает регистр только для ASCII, поэтому
+        # на SQLite запрос может не найти названия с заглавной кириллицей
+        mismatched = sum(
+            sorted(row['id'] for row in orm_startswith(prefix))
+            != [row['id'] for row in ingredient_index.startswith(prefix)]
+            for prefix in prefixes
+        )
+        results = []
+        for title, function in (
+            ('ORM istartswith', orm_startswith),
+            ('индекс в памяти', ingredient_index.startswith),
+        ):
+            p50, p99 = percentiles(
+                measure(function, prefixes, options.repeat)
+            )
+            results.append((title, p50, p99))
+    print(
+        f'Ингредиентов: {len(rows)}, префиксов: {len(prefixes)}, '
+        f'различий в результатах: {mismatched}'
+    )
+    print_table(('путь', 'p50, мс', 'p99, мс'), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Время ранжированного поиска ингредиентов (search_ingredients) по
+data/ingredients.csv для запросов по началу названия, по слову из
+середины названия и с опечаткой. Бенчмарк завершается с ошибкой, если
+p99 какой-либо группы запросов превышает --target-p99.
+"""
+import random
+import sys
+
+from benchmarks.common import (benchmark_database, get_parser, measure,
+                               percentiles, print_table, read_ingredients)
+
+from django.conf import settings
+from django.db import connection
+
+from recipes.models import Ingredient
+from recipes.search import create_search_structures, search_ingredients
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+
+def make_typo(word, randomizer):
+    """Замена одной буквы слова случайной буквой."""
+    position = randomizer.randrange(len(word))
+    return word[:position] + randomizer.choice(ALPHABET) + word[position + 1:]
+
+
+def make_queries(names, count, randomizer):
+    """Группы запросов: начало названия, слово из середины, опечатка."""
+    sample = randomizer.sample(names, count)
+    middle = [
+        words[-1] for words in (name.split() for name in names)
+        if len(words) > 1 and len(words[-1]) > 3
+    ]
+    return {
+        'начало названия': [
+            name[:randomizer.randint(2, 5)] for name in sample
+        ],
+        'слово из середины': randomizer.sample(middle, count),
+        'опечатка': [
+            make_typo(name.split()[0], randomizer) for name in sample
+            if len(name.split()[0]) > 3
+        ],
+    }
+
+
+def search(text):
+    """Поиск с ограничением количества результатов по умолчанию."""
+    return search_ingredients(text, settings.INGREDIENT_SEARCH_LIMIT)
+
+
+def main():
+    parser = get_parser(__doc__)
+    parser.set_defaults(repeat=20)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument(
+        '--target-p99', type=float, default=10.0,
+        help='Допустимый p99 в миллисекундах.'
+    )
+    options = parser.parse_args()
+    rows = read_ingredients()
+    queries = make_queries(
+        [name for name, _ in rows], options.queries, random.Random(0)
+    )
+    results, failed = [], False
+    with benchmark_database():
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit=unit)
+            for name, unit in rows
+        )
+        create_search_structures(connection.alias)
+        for group, texts in queries.items():
+            found = sum(bool(search(text)) for text in texts)
+            p50, p99 = percentiles(measure(search, texts, options.repeat))
+            failed = failed or p99 > options.target_p99
+            results.append((group, f'{found}/{len(texts)}', p50, p99))
+    print(
+        f'Ингредиентов: {len(rows)}, СУБД: {connection.vendor}, '
+        f'цель p99: {options.target_p99} мс'
+    )
+    print_table(('запросы', 'найдено', 'p50, мс', 'p99, мс'), results)
+    if failed:
+        sys.exit('p99 превышает цель.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Пропускная способность и время ответа gunicorn в режимах wsgi и asgi
+(SERVER_MODE) при 50, 200 и 500 одновременных соединениях. Для каждого
+режима запускается gunicorn с gunicorn.conf.py, нагрузка создаётся
+GET-запросами без keep-alive: синхронные воркеры его не поддерживают.
+Запросы идут в базу данных и кеш из переменных окружения, а не во
+временную базу; при GUNICORN_WORKERS больше 1 нужен общий CACHE_BACKEND.
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from itertools import cycle
+from urllib.parse import quote
+
+from benchmarks.common import get_parser, percentiles, print_table
+
+from django.conf import settings
+
+MODES = ('wsgi', 'asgi')
+CONCURRENCY = (50, 200, 500)
+PATHS = ('/api/tags/', '/api/ingredients/?name=сол', '/api/recipes/?limit=6')
+START_TIMEOUT = 30
+
+
+async def fetch(port, path):
+    """Время ответа на GET-запрос в миллисекундах и код ответа."""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(
+        f'GET {quote(path, safe="/?=&")} HTTP/1.1\r\nHost: localhost\r\n'
+        'Connection: close\r\n\r\n'.encode()
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    status = int(response.split(b' ', 2)[1]) if response else 0
+    return (time.perf_counter() - start) * 1000, status
+
+
+async def load(port, paths, concurrency, count):
+    '''
+    count запросов по очереди к адресам paths из concurrency
+    одновременных соединений: время выполнения в секундах, время
+    ответов в миллисекундах и количество ошибок.
+    '''
+    requests = iter(path for path, _ in zip(cycle(paths), range(count)))
+    timings, errors = [], 0
+
+    async def worker():
+        nonlocal errors
+        for path in requests:
+            try:
+                elapsed, status = await fetch(port, path)
+            except OSError:
+                errors += 1
+                continue
+            if status != 200:
+                errors += 1
+                continue
+            timings.append(elapsed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, timings, errors
+
+
+def wait_for_server(port, server):
+    """Ожидание, пока gunicorn начнёт принимать соединения."""
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(
+                f'gunicorn завершился с кодом {server.returncode}'
+            )
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('gunicorn не запустился')
+
+
+def main():
+    parser = get_parser(__doc__)
+    parser.set_defaults(repeat=2000)
+    parser.add_argument(
+        '--modes', nargs='+', choices=MODES, default=MODES,
+        help='Режимы gunicorn для сравнения.'
+    )
+    parser.add_argument(
+        '--concurrency', type=int, nargs='+', default=CONCURRENCY,
+        help='Количества одновременных соединений.'
+    )
+    parser.add_argument(
+        '--paths', nargs='+', default=PATHS,
+        help='Адреса, которые запрашиваются по очереди.'
+    )
+    parser.add_argument('--port', type=int, default=8765)
+    options = parser.parse_args()
+    results = []
+    for mode in options.modes:
+        server = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn',
+                '--config', 'gunicorn.conf.py',
+                '--bind', f'127.0.0.1:{options.port}',
+            ],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, 'SERVER_MODE': mode},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_for_server(options.port, server)
+            asyncio.run(load(options.port, options.paths, 10, 100))
+            for concurrency in options.concurrency:
+                elapsed, timings, errors = asyncio.run(load(
+                    options.port, options.paths, concurrency, options.repeat
+                ))
+                p50, p99 = percentiles(timings)
+                results.append((
+                    mode, concurrency, len(timings) / elapsed, p50, p99,
+                    errors
+                ))
+        finally:
+            server.terminate()
+            server.wait()
+    print(
+        f'Запросов на замер: {options.repeat}, '
+        f'воркеров: {os.getenv("GUNICORN_WORKERS", 1)}'
+    )
+    print_table(
+        ('режим', 'соединений', 'запросов/с', 'p50, мс', 'p99, мс',
+         'ошибок'),
+        results
+    )
+
+
+if __name__ == '__main__':
+    main()
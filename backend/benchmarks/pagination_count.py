@@ -0,0 +1,86 @@
+"""
+Время ответа страницы списка рецептов при разных способах подсчёта
+общего количества (pagination_count_strategy): exact, cached и
+estimated, на 100 тыс. и 1 млн рецептов, без фильтров и с фильтром
+по тегу. В SQLite способ estimated сводится к cached: статистика
+reltuples есть только в PostgreSQL.
+"""
+from itertools import islice
+
+from benchmarks.common import (benchmark_database, get_parser, measure,
+                               percentiles, print_table)
+
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from api.views import RecipeViewSet
+from recipes.models import Recipe, Tag, TagToRecipe
+from users.models import CustomUser
+
+SIZES = (100_000, 1_000_000)
+STRATEGIES = ('exact', 'cached', 'estimated')
+BATCH_SIZE = 10_000
+
+
+def fill(author, tags, start, stop):
+    """Пакетное добавление рецептов с номерами от start до stop."""
+    recipes = (
+        Recipe(
+            author=author, name=f'Рецепт {number}', text='Описание',
+            image='recipes/images/recipe.png'
+        )
+        for number in range(start, stop)
+    )
+    while True:
+        batch = list(islice(recipes, BATCH_SIZE))
+        if not batch:
+            return
+        Recipe.objects.bulk_create(batch)
+        TagToRecipe.objects.bulk_create(
+            TagToRecipe(recipe=recipe, tag=tags[recipe.pk % len(tags)])
+            for recipe in batch
+        )
+
+
+def main():
+    parser = get_parser(__doc__)
+    parser.set_defaults(repeat=30)
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=SIZES,
+        help='Количества рецептов для измерений.'
+    )
+    options = parser.parse_args()
+    results = []
+    with benchmark_database():
+        author = CustomUser.objects.create_user(
+            username='author', email='author@foodgram.ru', password='password'
+        )
+        tags = Tag.objects.bulk_create(
+            Tag(name=f'Тег {i}', color='#000000', slug=f'tag{i}')
+            for i in range(3)
+        )
+        client = APIClient()
+        urls = (
+            ('без фильтров', '/api/recipes/?limit=6&page=2'),
+            ('tags=tag0', '/api/recipes/?limit=6&page=2&tags=tag0'),
+        )
+        filled = 0
+        for size in sorted(options.sizes):
+            fill(author, tags, filled, size)
+            filled = size
+            cache.clear()
+            for strategy in STRATEGIES:
+                RecipeViewSet.pagination_count_strategy = strategy
+                for title, url in urls:
+                    client.get(url)
+                    p50, p99 = percentiles(
+                        measure(client.get, (url,), options.repeat)
+                    )
+                    results.append((size, strategy, title, p50, p99))
+    print_table(
+        ('рецептов', 'подсчёт', 'запрос', 'p50, мс', 'p99, мс'), results
+    )
+
+
+if __name__ == '__main__':
+    main()
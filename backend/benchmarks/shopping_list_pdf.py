@@ -0,0 +1,125 @@
+"""
+Время и пиковый объём памяти формирования pdf-файла списка покупок
+для корзин на 10, 100 и 1000 строк: запрос к API целиком, модуль
+api.shopping_list и прежний способ (регистрация шрифта на каждый
+запрос, документ в io.BytesIO, setFont на каждую строку).
+"""
+import io
+import statistics
+
+from benchmarks.common import (benchmark_database, get_parser,
+                               measure_memory, print_table)
+
+from django.core.files.base import ContentFile
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.shopping_list import FONT_PATH, render_pdf
+from recipes.models import Ingredient, IngredientToRecipe, Recipe
+from users.models import CustomUser
+
+CART_SIZES = (10, 100, 1000)
+
+
+def legacy_render(ingredients):
+    """Формирование pdf-файла так, как это делалось до api.shopping_list."""
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    pdfmetrics.registerFont(
+        TTFont(name='Tantular', filename=FONT_PATH, asciiReadable='UTF-8')
+    )
+    y_position = 800
+    pdf.setFont('Tantular', 16)
+    pdf.drawString(50, y_position, 'Ваш список ингредиентов:')
+    for number, (name, unit, amount) in enumerate(ingredients, start=1):
+        pdf.setFont('Tantular', 14)
+        pdf.drawString(
+            50, y_position - 30, f'{number}. {name.capitalize()} ({unit}) - '
+            f'{amount}'
+        )
+        y_position -= 15
+        if y_position <= 50:
+            pdf.showPage()
+            y_position = 800
+    pdf.save()
+    buffer.seek(0)
+    return buffer
+
+
+def read_all(file):
+    """Чтение файла блоками, как это делает FileResponse."""
+    while file.read(8192):
+        pass
+
+
+def create_cart(size):
+    """Пользователь с рецептом на size ингредиентов в корзине."""
+    user = CustomUser.objects.create_user(
+        username=f'user{size}', email=f'user{size}@foodgram.ru',
+        password='password'
+    )
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(name=f'ингредиент {size} {i}', measurement_unit='г')
+        for i in range(size)
+    )
+    recipe = Recipe.objects.create(
+        author=user, name=f'Рецепт {size}', text='Описание',
+        image=ContentFile(b'', name='recipe.png')
+    )
+    IngredientToRecipe.objects.bulk_create(
+        IngredientToRecipe(recipe=recipe, ingredient=ingredient, amount=i + 1)
+        for i, ingredient in enumerate(ingredients)
+    )
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}'
+    )
+    client.post(f'/api/recipes/{recipe.pk}/shopping_cart/')
+    rows = [
+        (ingredient.name, ingredient.measurement_unit, i + 1)
+        for i, ingredient in enumerate(ingredients)
+    ]
+    return client, rows
+
+
+def request_pdf(client):
+    """Полный запрос к API с чтением ответа."""
+    response = client.get('/api/recipes/download_shopping_cart/')
+    assert response.status_code == 200, response.status_code
+    for _ in response.streaming_content:
+        pass
+    response.close()
+
+
+def run(function, repeat):
+    """Медианы времени и пиковой памяти за repeat вызовов."""
+    results = [measure_memory(function) for _ in range(repeat)]
+    return (
+        statistics.median(elapsed for elapsed, _ in results),
+        statistics.median(peak for _, peak in results),
+    )
+
+
+def main():
+    parser = get_parser(__doc__)
+    parser.set_defaults(repeat=10)
+    options = parser.parse_args()
+    results = []
+    with benchmark_database():
+        for size in CART_SIZES:
+            client, rows = create_cart(size)
+            request_pdf(client)
+            for title, function in (
+                ('запрос к API', lambda: request_pdf(client)),
+                ('render_pdf', lambda: read_all(render_pdf(rows))),
+                ('прежний способ', lambda: read_all(legacy_render(rows))),
+            ):
+                results.append((size, title, *run(function, options.repeat)))
+    print_table(('строк', 'способ', 'время, мс', 'пик памяти, КиБ'), results)
+
+
+if __name__ == '__main__':
+    main()
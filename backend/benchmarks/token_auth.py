@@ -0,0 +1,80 @@
+"""
+Запросы к базе и время ответа списка рецептов для авторизованного
+пользователя с аутентификацией TokenAuthentication и
+CachedTokenAuthentication. Кеш рецептов прогрет, так что остаются
+запросы аутентификации и сами запросы списка.
+"""
+from benchmarks.common import (benchmark_database, get_parser, measure,
+                               percentiles, print_table)
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import CachedTokenAuthentication
+from api.views import RecipeViewSet
+from recipes.models import Ingredient, IngredientToRecipe, Recipe, Tag
+from users.models import CustomUser
+
+URL = '/api/recipes/?limit=6'
+
+
+def fill():
+    """Автор с шестью рецептами и пользователь с токеном."""
+    author = CustomUser.objects.create_user(
+        username='author', email='author@foodgram.ru', password='password'
+    )
+    tag = Tag.objects.create(name='Тег', color='#000000', slug='tag')
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(name=f'ингредиент {i}', measurement_unit='г')
+        for i in range(10)
+    )
+    for number in range(6):
+        recipe = Recipe.objects.create(
+            author=author, name=f'Рецепт {number}', text='Описание',
+            image='recipes/images/recipe.png'
+        )
+        recipe.tags.add(tag)
+        IngredientToRecipe.objects.bulk_create(
+            IngredientToRecipe(recipe=recipe, ingredient=ingredient, amount=1)
+            for ingredient in ingredients
+        )
+    user = CustomUser.objects.create_user(
+        username='user', email='user@foodgram.ru', password='password'
+    )
+    return Token.objects.create(user=user)
+
+
+def main():
+    options = get_parser(__doc__).parse_args()
+    results = []
+    with benchmark_database():
+        token = fill()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        default = RecipeViewSet.authentication_classes
+        try:
+            for authentication in (
+                TokenAuthentication, CachedTokenAuthentication
+            ):
+                RecipeViewSet.authentication_classes = (authentication,)
+                client.get(URL)
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(URL)
+                assert response.status_code == 200, response.status_code
+                # журнал запросов соединения ограничен, число запросов
+                # нужно взять до замеров времени
+                count = len(queries)
+                p50, p99 = percentiles(
+                    measure(client.get, (URL,), options.repeat)
+                )
+                results.append((authentication.__name__, count, p50, p99))
+        finally:
+            RecipeViewSet.authentication_classes = default
+    print_table(('аутентификация', 'запросов', 'p50, мс', 'p99, мс'), results)
+
+
+if __name__ == '__main__':
+    main()
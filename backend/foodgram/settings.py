@@ -2,6 +2,8 @@ import os
 from distutils.util import strtobool
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -18,6 +20,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'djoser',
@@ -29,6 +32,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.RequestMetricsMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -57,6 +62,13 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 0))
+DB_CONN_HEALTH_CHECKS = bool(
+    strtobool(os.getenv('DB_CONN_HEALTH_CHECKS', 'False'))
+)
+
 if strtobool(os.getenv('PROD_FLAG')):
     DATABASES = {
         'default': {
@@ -65,17 +77,65 @@ if strtobool(os.getenv('PROD_FLAG')):
             'USER': os.getenv('POSTGRES_USER'),
             'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
             'HOST': os.getenv('DB_HOST'),
-            'PORT': os.getenv('DB_PORT')
+            'PORT': os.getenv('DB_PORT'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
         }
     }
+    if os.getenv('DB_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': os.getenv('DB_REPLICA_HOST'),
+            'PORT': os.getenv('DB_REPLICA_PORT', os.getenv('DB_PORT')),
+        }
 else:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
         }
     }
+    if strtobool(os.getenv('DB_REPLICA', 'False')):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'NAME': os.path.join(BASE_DIR, 'db_replica.sqlite3'),
+        }
+
+if 'replica' in DATABASES:
+    DATABASES['replica'].update(
+        CONN_MAX_AGE=int(
+            os.getenv('DB_REPLICA_CONN_MAX_AGE', DB_CONN_MAX_AGE)
+        ),
+        CONN_HEALTH_CHECKS=bool(strtobool(os.getenv(
+            'DB_REPLICA_CONN_HEALTH_CHECKS', str(DB_CONN_HEALTH_CHECKS)
+        ))),
+        # маршрутизация с отдельной базой реплики проверяется
+        # в api/tests/test_routing.py
+        TEST={'MIRROR': 'default'},
+    )
+
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
 
+if (
+    int(os.getenv('GUNICORN_WORKERS', 1)) > 1
+    and CACHES['default']['BACKEND'].endswith('.LocMemCache')
+):
+    raise ImproperlyConfigured(
+        'LocMemCache is not shared between gunicorn workers: set '
+        'CACHE_BACKEND to a shared cache when GUNICORN_WORKERS > 1.'
+    )
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -119,7 +179,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ),
 }
 
@@ -141,4 +201,16 @@ RECIPE_NAME_LENGTH = 200
 INGREDIENT_NAME_LENGTH = 100
 MEASUREMENT_UNIT_LENGTH = 10
 RECIPE_TEXT_NAME_LENGTH = 1000
+RECIPE_IMAGE_THUMB_SIZE = (480, 320)
+RECIPE_IMAGE_DETAIL_SIZE = (1280, 960)
+RECIPE_IMAGE_QUALITY = 80
 EMPTY_VALUE_DISPLAY = '-пусто-'
+CATALOGUE_CACHE_TIMEOUT = 60 * 60
+CURSOR_PAGE_SIZE = 6
+PAGINATION_COUNT_CACHE_TIMEOUT = 30
+INGREDIENT_SEARCH_LIMIT = 20
+INGREDIENT_TRIGRAM_THRESHOLD = 0.3
+BULK_RECIPES_LIMIT = 100
+RECIPE_CACHE_TIMEOUT = 60 * 60 * 24
+TOKEN_CACHE_TIMEOUT = 60 * 5
+FEED_PRECOMPUTE = bool(strtobool(os.getenv('FEED_PRECOMPUTE', 'False')))
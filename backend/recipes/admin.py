@@ -2,10 +2,12 @@ from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import Group
+from django.db.models import Count
 from django.utils.translation import gettext_lazy as _
 
 from recipes.models import (FavoriteRecipe, Ingredient, IngredientToRecipe,
-                            Recipe, ShoppingCart, Tag, TagToRecipe)
+                            Recipe, ShoppingCart, ShoppingListItem, Tag,
+                            TagToRecipe)
 from users.models import CustomUser, Subscription
 
 
@@ -13,7 +15,11 @@ admin.site.unregister(Group)
 
 
 class CustomUserAdmin(UserAdmin):
-    pass
+    list_display = UserAdmin.list_display + (
+        'recipes_count',
+        'subscribers_count'
+    )
+    show_full_result_count = False
 
 
 admin.site.register(CustomUser, CustomUserAdmin)
@@ -36,11 +42,28 @@ class CustomUserAdmin(admin.ModelAdmin):
 
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
-    list_display = ('subscriber', 'subscribing')
-    search_fields = ('subscriber',)
+    list_display = ('subscriber', 'subscribing', 'add_date')
+    list_select_related = ('subscriber', 'subscribing')
+    search_fields = ('subscriber__username', 'subscribing__username')
+    autocomplete_fields = ('subscriber', 'subscribing')
+    show_full_result_count = False
     empty_value_display = settings.EMPTY_VALUE_DISPLAY
 
 
+class IngredientToRecipeInline(admin.TabularInline):
+    model = IngredientToRecipe
+    autocomplete_fields = ('ingredient',)
+    min_num = 1
+    extra = 0
+
+
+class TagToRecipeInline(admin.TabularInline):
+    model = TagToRecipe
+    autocomplete_fields = ('tag',)
+    min_num = 1
+    extra = 0
+
+
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     list_display = (
@@ -49,60 +72,96 @@ class RecipeAdmin(admin.ModelAdmin):
         'created',
         'image',
         'cooking_time',
-        'count_favorites',
+        'favorites_count',
     )
-    search_fields = ('username', 'email', 'first_name', 'last_name')
-    list_filter = ('author', 'name', 'tags')
+    list_select_related = ('author',)
+    search_fields = ('name', 'author__username', 'author__email')
+    list_filter = ('tags',)
+    autocomplete_fields = ('author',)
+    inlines = (IngredientToRecipeInline, TagToRecipeInline)
     ordering = ('name',)
+    show_full_result_count = False
     empty_value_display = settings.EMPTY_VALUE_DISPLAY
 
-    def count_favorites(self, recipe):
-        return recipe.favorite_recipe.count()
-    count_favorites.short_description = _('Добавлено в "Избранное"')
-
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
-    list_display = ('name', 'color', 'slug')
+    list_display = ('name', 'color', 'slug', 'recipes_count')
     search_fields = ('name', 'color', 'slug')
     list_filter = ('name', 'color', 'slug')
     ordering = ('name',)
     empty_value_display = settings.EMPTY_VALUE_DISPLAY
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            recipes_count=Count('tag_for_recipe')
+        )
+
+    @admin.display(
+        description=_('количество рецептов'),
+        ordering='recipes_count'
+    )
+    def recipes_count(self, tag):
+        return tag.recipes_count
+
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'measurement_unit')
-    list_filter = ('name',)
+    search_fields = ('name',)
+    list_filter = ('measurement_unit',)
     ordering = ('id',)
+    show_full_result_count = False
     empty_value_display = settings.EMPTY_VALUE_DISPLAY
 
 
 @admin.register(TagToRecipe)
 class TagToRecipeAdmin(admin.ModelAdmin):
     list_display = ('tag', 'recipe')
+    list_select_related = ('tag', 'recipe')
     list_filter = ('tag',)
+    search_fields = ('recipe__name',)
+    autocomplete_fields = ('tag', 'recipe')
+    show_full_result_count = False
     empty_value_display = settings.EMPTY_VALUE_DISPLAY
 
 
 @admin.register(IngredientToRecipe)
 class IngredientToRecipeAdmin(admin.ModelAdmin):
     list_display = ('ingredient', 'amount', 'recipe')
-    list_filter = ('ingredient',)
+    list_select_related = ('ingredient', 'recipe')
+    search_fields = ('ingredient__name', 'recipe__name')
+    autocomplete_fields = ('ingredient', 'recipe')
+    show_full_result_count = False
     empty_value_display = settings.EMPTY_VALUE_DISPLAY
 
 
 @admin.register(FavoriteRecipe)
 class FavoriteRecipeAdmin(admin.ModelAdmin):
     list_display = ('user', 'recipe')
-    search_fields = ('user', 'recipe',)
-    search_fields = ('user',)
+    list_select_related = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
+    autocomplete_fields = ('user', 'recipe')
+    show_full_result_count = False
     empty_value_display = settings.EMPTY_VALUE_DISPLAY
 
 
 @admin.register(ShoppingCart)
 class Shopping_cartAdmin(admin.ModelAdmin):
     list_display = ('recipe', 'user', 'add_date')
-    search_fields = ('user',)
+    list_select_related = ('recipe', 'user')
+    search_fields = ('user__username', 'recipe__name')
     list_filter = ('add_date',)
+    autocomplete_fields = ('recipe', 'user')
+    show_full_result_count = False
+    empty_value_display = settings.EMPTY_VALUE_DISPLAY
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = ('user', 'ingredient', 'total_amount')
+    list_select_related = ('user', 'ingredient')
+    search_fields = ('user__username', 'ingredient__name')
+    autocomplete_fields = ('user', 'ingredient')
+    show_full_result_count = False
     empty_value_display = settings.EMPTY_VALUE_DISPLAY
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 from django.utils.translation import gettext_lazy as _
 
 
@@ -6,3 +7,13 @@ class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
     verbose_name = _('рецепты')
+
+    def ready(self):
+        from recipes import signals  # noqa: F401
+        from recipes.search import create_search_structures
+
+        post_migrate.connect(
+            lambda using, **kwargs: create_search_structures(using),
+            sender=self,
+            weak=False
+        )
@@ -0,0 +1,36 @@
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image
+
+
+RENDITIONS = {
+    'image_thumb': settings.RECIPE_IMAGE_THUMB_SIZE,
+    'image_detail': settings.RECIPE_IMAGE_DETAIL_SIZE,
+}
+
+
+def make_renditions(recipe):
+    """
+    Создание уменьшенных копий изображения рецепта в формате WebP
+    и сохранение их в полях image_thumb и image_detail.
+    """
+    recipe.image.open('rb')
+    with recipe.image, Image.open(recipe.image) as image:
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    name = os.path.splitext(os.path.basename(recipe.image.name))[0]
+    for field, size in RENDITIONS.items():
+        rendition = image.copy()
+        rendition.thumbnail(size)
+        buffer = io.BytesIO()
+        rendition.save(
+            buffer, format='WEBP', quality=settings.RECIPE_IMAGE_QUALITY
+        )
+        getattr(recipe, field).save(
+            f'{name}.webp', ContentFile(buffer.getvalue()), save=False
+        )
+    recipe.save(update_fields=RENDITIONS)
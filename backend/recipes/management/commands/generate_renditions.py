@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from recipes.images import make_renditions
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные копии изображений рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать копии для всех рецептов.'
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['force']:
+            recipes = recipes.filter(Q(image_thumb='') | Q(image_detail=''))
+        count = 0
+        for recipe in recipes.iterator():
+            try:
+                make_renditions(recipe)
+            except (OSError, ValueError) as error:
+                self.stderr.write(f'{recipe.image.name}: {error}')
+                continue
+            count += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано изображений: {count}')
+        )
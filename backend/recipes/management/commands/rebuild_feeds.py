@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.models import FeedEntry
+from users.models import Subscription
+
+
+def calculate_feeds():
+    """Расчёт лент всех пользователей по их подпискам."""
+    return {
+        (user_id, recipe_id): created
+        for user_id, recipe_id, created in Subscription.objects.filter(
+            subscribing__own_recipe__isnull=False
+        ).values_list(
+            'subscriber',
+            'subscribing__own_recipe',
+            'subscribing__own_recipe__created'
+        ).order_by()
+    }
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает предрассчитанные ленты подписок пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только сверить таблицу с расчётом, не изменяя её.'
+        )
+
+    def handle(self, *args, **options):
+        expected = calculate_feeds()
+        if options['verify']:
+            actual = {
+                (user_id, recipe_id): created
+                for user_id, recipe_id, created in (
+                    FeedEntry.objects.values_list('user', 'recipe', 'created')
+                )
+            }
+            mismatched = {
+                key for key in expected.keys() | actual.keys()
+                if expected.get(key) != actual.get(key)
+            }
+            if mismatched:
+                raise CommandError(
+                    f'Расхождений в лентах подписок: {len(mismatched)}'
+                )
+            self.stdout.write(self.style.SUCCESS('Расхождений нет.'))
+            return
+        with transaction.atomic():
+            FeedEntry.objects.all().delete()
+            FeedEntry.objects.bulk_create(
+                (
+                    FeedEntry(
+                        user_id=user_id,
+                        recipe_id=recipe_id,
+                        created=created
+                    )
+                    for (user_id, recipe_id), created in expected.items()
+                ),
+                batch_size=1000
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f'Записей в лентах подписок: {len(expected)}')
+        )
@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum
+
+from recipes.models import ShoppingCart, ShoppingListItem
+
+
+def calculate_shopping_lists():
+    """Расчёт списков покупок всех пользователей по их корзинам."""
+    rows = ShoppingCart.objects.filter(
+        recipe__recipe_to_ingredient__isnull=False
+    ).values(
+        'user', 'recipe__recipe_to_ingredient__ingredient'
+    ).annotate(
+        total_amount=Sum('recipe__recipe_to_ingredient__amount')
+    ).values_list(
+        'user',
+        'recipe__recipe_to_ingredient__ingredient',
+        'total_amount'
+    ).order_by()
+    return {
+        (user_id, ingredient_id): total_amount
+        for user_id, ingredient_id, total_amount in rows
+    }
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает таблицу списков покупок пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только сверить таблицу с расчётом, не изменяя её.'
+        )
+
+    def handle(self, *args, **options):
+        expected = calculate_shopping_lists()
+        if options['verify']:
+            actual = {
+                (user_id, ingredient_id): total_amount
+                for user_id, ingredient_id, total_amount in (
+                    ShoppingListItem.objects.values_list(
+                        'user', 'ingredient', 'total_amount'
+                    )
+                )
+            }
+            mismatched = {
+                key for key in expected.keys() | actual.keys()
+                if expected.get(key) != actual.get(key)
+            }
+            if mismatched:
+                raise CommandError(
+                    f'Расхождений в списках покупок: {len(mismatched)}'
+                )
+            self.stdout.write(self.style.SUCCESS('Расхождений нет.'))
+            return
+        with transaction.atomic():
+            ShoppingListItem.objects.all().delete()
+            ShoppingListItem.objects.bulk_create(
+                (
+                    ShoppingListItem(
+                        user_id=user_id,
+                        ingredient_id=ingredient_id,
+                        total_amount=total_amount
+                    )
+                    for (user_id, ingredient_id), total_amount in (
+                        expected.items()
+                    )
+                ),
+                batch_size=1000
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f'Записей в списках покупок: {len(expected)}')
+        )
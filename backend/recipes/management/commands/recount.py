@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import FavoriteRecipe, Recipe
+from users.models import CustomUser, Subscription
+
+
+def count_subquery(queryset, field):
+    """Подзапрос количества строк queryset для каждого значения field."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(
+                **{field: OuterRef('pk')}
+            ).values(field).annotate(
+                count=Count('pk')
+            ).values('count'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+COUNTERS = (
+    (
+        Recipe,
+        'favorites_count',
+        count_subquery(FavoriteRecipe.objects.all(), 'recipe')
+    ),
+    (
+        CustomUser,
+        'recipes_count',
+        count_subquery(Recipe.objects.all(), 'author')
+    ),
+    (
+        CustomUser,
+        'subscribers_count',
+        count_subquery(Subscription.objects.all(), 'subscribing')
+    ),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики избранного, рецептов и подписчиков '
+        'по исходным таблицам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только сверить счётчики с расчётом, не изменяя их.'
+        )
+
+    def handle(self, *args, **options):
+        mismatched = 0
+        with transaction.atomic():
+            for model, field, expected in COUNTERS:
+                drift = model.objects.exclude(**{field: expected})
+                if options['verify']:
+                    count = drift.count()
+                else:
+                    count = drift.update(**{field: expected})
+                mismatched += count
+                self.stdout.write(
+                    f'{model._meta.model_name}.{field}: '
+                    f'расхождений {count}'
+                )
+        if options['verify'] and mismatched:
+            raise CommandError(f'Расхождений в счётчиках: {mismatched}')
+        self.stdout.write(self.style.SUCCESS('Счётчики актуальны.'))
@@ -1,56 +1,153 @@
 import base64
 import csv
 import os
+import time
+from itertools import islice
 
 from django.conf import settings
 from django.contrib.auth.hashers import make_password
 from django.core.files.base import ContentFile
 from django.core.management.base import BaseCommand
+from django.db import connection, transaction
 from recipes.models import (Ingredient, IngredientToRecipe, Recipe, Tag,
                             TagToRecipe)
+from recipes.versions import (INGREDIENTS_VERSION_KEY, TAGS_VERSION_KEY,
+                              bump_version)
 from users.models import CustomUser
 
 
-def ingredient_create(row):
-    Ingredient.objects.get_or_create(
-        name=row[0],
-        measurement_unit=row[1],
+BATCH_SIZE = 1000
+
+
+def chunks(iterable, size=BATCH_SIZE):
+    """Разбиение потока строк на пакеты заданного размера."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def bulk_insert(model, objects):
+    """Пакетная запись объектов, каждый пакет в отдельной транзакции."""
+    count = 0
+    for chunk in chunks(objects):
+        with transaction.atomic():
+            model.objects.bulk_create(
+                chunk, batch_size=BATCH_SIZE, ignore_conflicts=True
+            )
+        count += len(chunk)
+    return count
+
+
+def ingredient_create(reader, **options):
+    existing = set(
+        Ingredient.objects.values_list('name', 'measurement_unit')
     )
 
+    def new_ingredients():
+        for name, measurement_unit in reader:
+            if (name, measurement_unit) in existing:
+                continue
+            existing.add((name, measurement_unit))
+            yield Ingredient(name=name, measurement_unit=measurement_unit)
+
+    count = bulk_insert(Ingredient, new_ingredients())
+    bump_version(INGREDIENTS_VERSION_KEY)
+    return count
+
+
+def ingredient_copy(file):
+    """Загрузка ингредиентов через COPY во временную таблицу (PostgreSQL)."""
+    table = Ingredient._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE TEMP TABLE upload_ingredient '
+            '(name text, measurement_unit text) ON COMMIT DROP'
+        )
+        cursor.copy_expert(
+            'COPY upload_ingredient FROM STDIN WITH (FORMAT csv)', file
+        )
+        cursor.execute(
+            f'INSERT INTO {table} (name, measurement_unit) '
+            'SELECT DISTINCT u.name, u.measurement_unit '
+            'FROM upload_ingredient u WHERE NOT EXISTS ('
+            f'SELECT 1 FROM {table} i WHERE i.name = u.name '
+            'AND i.measurement_unit = u.measurement_unit)'
+        )
+        count = cursor.rowcount
+    bump_version(INGREDIENTS_VERSION_KEY)
+    return count
+
 
-def tag_create(row):
-    Tag.objects.get_or_create(
-        name=row[0],
-        color=row[1],
-        slug=row[2],
+def tag_create(reader, **options):
+    existing = set(Tag.objects.values_list('slug', flat=True))
+    count = bulk_insert(
+        Tag,
+        (
+            Tag(name=name, color=color, slug=slug)
+            for name, color, slug in reader
+            if slug not in existing
+        )
     )
+    bump_version(TAGS_VERSION_KEY)
+    return count
 
 
-def recipe_create(row, author):
-    ingredients = Ingredient.objects.all()
-    tags = Tag.objects.all()
-    data_format, image_data = row[27].split(';base64,')
-    ext = data_format.split('/')[-1]
-    recipe = Recipe.objects.get_or_create(
-        author=author[0],
-        image=ContentFile(base64.b64decode(image_data), name='temp.' + ext),
-        name=row[28],
-        text=row[29],
-        cooking_time=row[30]
+def recipe_create(reader, author, **options):
+    """
+    Загрузка рецептов. Рецепты создаются по одному: счётчик рецептов
+    автора и ленты подписчиков обновляют сигналы модели Recipe.
+    """
+    ingredient_ids = list(
+        Ingredient.objects.order_by('id').values_list('id', flat=True)
+    )
+    tag_ids = list(Tag.objects.order_by('id').values_list('id', flat=True))
+    existing = set(
+        Recipe.objects.filter(author=author).values_list('name', flat=True)
     )
-    for i in range(0, 22, 2):
-        if row[i] != 'нет':
-            IngredientToRecipe.objects.get_or_create(
-                ingredient=ingredients[int(row[i]) - 1],
-                amount=row[i + 1],
-                recipe=recipe[0]
+    count = 0
+    for chunk in chunks(reader):
+        ingredients_to_recipes, tags_to_recipes = [], []
+        with transaction.atomic():
+            for row in chunk:
+                if row[28] in existing:
+                    continue
+                existing.add(row[28])
+                data_format, image_data = row[27].split(';base64,')
+                ext = data_format.split('/')[-1]
+                recipe = Recipe.objects.create(
+                    author=author,
+                    image=ContentFile(
+                        base64.b64decode(image_data), name='temp.' + ext
+                    ),
+                    name=row[28],
+                    text=row[29],
+                    cooking_time=row[30]
+                )
+                ingredients_to_recipes.extend(
+                    IngredientToRecipe(
+                        ingredient_id=ingredient_ids[int(row[i]) - 1],
+                        amount=row[i + 1],
+                        recipe=recipe
+                    )
+                    for i in range(0, 22, 2)
+                    if row[i] != 'нет'
+                )
+                tags_to_recipes.extend(
+                    TagToRecipe(tag_id=tag_ids[int(row[j])], recipe=recipe)
+                    for j in range(24, 27)
+                    if row[j] != 'нет'
+                )
+                count += 1
+            IngredientToRecipe.objects.bulk_create(
+                ingredients_to_recipes, ignore_conflicts=True
             )
-    for j in range(24, 27):
-        if row[j] != 'нет':
-            TagToRecipe.objects.get_or_create(
-                tag=tags[int(row[j])],
-                recipe=recipe[0]
+            TagToRecipe.objects.bulk_create(
+                tags_to_recipes, ignore_conflicts=True
             )
+    return count
 
 
 action = {
@@ -68,23 +165,39 @@ class Command(BaseCommand):
             nargs='+',
             type=str
         )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Загружать ингредиенты через COPY (только PostgreSQL).'
+        )
 
     def handle(self, *args, **options):
+        use_copy = (
+            options['copy'] and connection.vendor == 'postgresql'
+        )
         for filename in options['filename']:
             path = os.path.join(settings.BASE_DIR, 'data/') + filename
+            start = time.perf_counter()
             with open(path, 'r', encoding='utf-8') as file:
-                reader = csv.reader(file)
-                if filename == 'recipes.csv':
-                    author = CustomUser.objects.get_or_create(
-                        username='vasya.pupkin',
-                        email='vasya@yandex.ru',
-                        first_name='Вася',
-                        last_name='Пупкин',
-                        password=make_password('password'),
-                        role='admin',
-                    )
-                    for row in reader:
-                        action[filename](row, author)
+                if filename == 'ingredients.csv' and use_copy:
+                    count = ingredient_copy(file)
                 else:
-                    for row in reader:
-                        action[filename](row)
+                    reader = csv.reader(file)
+                    author = None
+                    if filename == 'recipes.csv':
+                        author, _ = CustomUser.objects.get_or_create(
+                            username='vasya.pupkin',
+                            defaults={
+                                'email': 'vasya@yandex.ru',
+                                'first_name': 'Вася',
+                                'last_name': 'Пупкин',
+                                'password': make_password('password'),
+                                'role': 'admin',
+                            }
+                        )
+                    count = action[filename](reader, author=author)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{filename}: записано строк {count} за {elapsed:.2f} с '
+                f'({count / elapsed if elapsed else count:.0f} строк/с)'
+            )
@@ -1,4 +1,5 @@
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.core import validators
 from django.db import models
 from django.utils.translation import gettext_lazy as _
@@ -83,6 +84,16 @@ class Recipe(models.Model):
         verbose_name=_('изображение'),
         upload_to='recipes/images/',
     )
+    image_thumb = models.ImageField(
+        verbose_name=_('миниатюра изображения'),
+        upload_to='recipes/images/thumbs/',
+        blank=True
+    )
+    image_detail = models.ImageField(
+        verbose_name=_('изображение для страницы рецепта'),
+        upload_to='recipes/images/detail/',
+        blank=True
+    )
     name = models.CharField(
         verbose_name=_('название рецепта'),
         max_length=settings.RECIPE_NAME_LENGTH,
@@ -96,6 +107,17 @@ class Recipe(models.Model):
         verbose_name=_('время приготовления (в минутах)'),
         default=1
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name=_('добавлено в "Избранное"'),
+        default=0,
+        editable=False,
+        db_index=True
+    )
+    search_vector = SearchVectorField(
+        verbose_name=_('поисковый вектор'),
+        null=True,
+        editable=False
+    )
 
     class Meta:
         verbose_name = _('рецепт')
@@ -107,6 +129,12 @@ class Recipe(models.Model):
                 name='unique_author_name'
             )
         ]
+        indexes = (
+            models.Index(
+                fields=('author', '-created'),
+                name='recipe_author_created_idx'
+            ),
+        )
 
     def __str__(self):
         """Строковое представление объекта модели Recipe."""
@@ -137,6 +165,12 @@ class FavoriteRecipe(models.Model):
                 name='unique_favorite_recipe'
             )
         ]
+        indexes = (
+            models.Index(
+                fields=('recipe', 'user'),
+                name='favorite_recipe_user_idx'
+            ),
+        )
 
     def __str__(self):
         """Строковое представление объекта модели FavoriteRecipe."""
@@ -172,6 +206,12 @@ class ShoppingCart(models.Model):
                 name='unique_recipe_in_cart'
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('recipe', 'user'),
+                name='cart_recipe_user_idx'
+            ),
+        )
 
     def __str__(self):
         """Строковое представление объекта модели RecipeToShopping."""
@@ -238,7 +278,91 @@ class TagToRecipe(models.Model):
                 name='unique_tag_for_recipe'
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('recipe', 'tag'),
+                name='tag_to_recipe_recipe_tag_idx'
+            ),
+        )
 
     def __str__(self):
         """Строковое представление объекта модели TagToRecipe."""
         return f'{self.tag} - {self.recipe}'
+
+
+class ShoppingListItem(models.Model):
+    """
+    Модель суммарного количества ингредиента в списке покупок пользователя.
+    Обновляется при изменении списка покупок и состава рецептов.
+    """
+    user = models.ForeignKey(
+        verbose_name=_('пользователь'),
+        to=CustomUser,
+        on_delete=models.CASCADE,
+        related_name='shopping_list'
+    )
+    ingredient = models.ForeignKey(
+        verbose_name=_('ингредиент'),
+        to=Ingredient,
+        on_delete=models.CASCADE,
+        related_name='in_shopping_list'
+    )
+    total_amount = models.PositiveIntegerField(
+        verbose_name=_('общее количество')
+    )
+
+    class Meta:
+        verbose_name = _('ингредиент в списке покупок')
+        verbose_name_plural = _('ингредиенты в списках покупок')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_ingredient_in_shopping_list'
+            ),
+        )
+
+    def __str__(self):
+        """Строковое представление объекта модели ShoppingListItem."""
+        return f'{self.ingredient} в списке покупок {self.user}'
+
+
+class FeedEntry(models.Model):
+    """
+    Модель предрассчитанной ленты: рецепт автора, на которого подписан
+    пользователь. Заполняется при включённой настройке FEED_PRECOMPUTE.
+    """
+    user = models.ForeignKey(
+        verbose_name=_('пользователь'),
+        to=CustomUser,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    recipe = models.ForeignKey(
+        verbose_name=_('рецепт'),
+        to=Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    created = models.DateTimeField(
+        verbose_name=_('дата создания рецепта')
+    )
+
+    class Meta:
+        verbose_name = _('запись ленты подписок')
+        verbose_name_plural = _('записи ленты подписок')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_feed_entry'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-created'),
+                name='feed_entry_user_created_idx'
+            ),
+        )
+
+    def __str__(self):
+        """Строковое представление объекта модели FeedEntry."""
+        return f'{self.recipe} в ленте {self.user}'
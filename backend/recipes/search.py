@@ -0,0 +1,263 @@
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector, TrigramSimilarity)
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.functions import Upper
+from django.db.models.expressions import RawSQL
+
+from recipes.models import Ingredient, Recipe
+from recipes.versions import INGREDIENTS_VERSION_KEY, get_version
+
+
+SEARCH_CONFIG = 'russian'
+SEARCH_INDEX_NAME = 'recipe_search_vector_idx'
+SEARCH_TABLE = 'recipes_recipe_search'
+SEARCH_TOKEN_REGEX = re.compile(r'\w+')
+INGREDIENT_TRIGRAM_INDEX_NAME = 'ingredient_name_trgm_idx'
+SEARCH_VECTOR = (
+    SearchVector('name', weight='A', config=SEARCH_CONFIG)
+    + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+)
+
+
+def trigrams(text):
+    """
+    Множество триграмм строки по правилам pg_trgm:
+    каждое слово дополняется двумя пробелами слева и одним справа.
+    """
+    return {
+        padded[i:i + 3]
+        for word in SEARCH_TOKEN_REGEX.findall(text.casefold())
+        for padded in (f'  {word} ',)
+        for i in range(len(padded) - 2)
+    }
+
+
+class IngredientIndex:
+    """
+    Индекс названий ингредиентов в памяти процесса.
+    Строится при первом обращении и перестраивается после смены
+    метки версии ингредиентов в общем кеше.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._index = ([], [], {}, [])
+
+    def _build(self):
+        '''
+        Построение отсортированного по названию индекса
+        и инвертированного индекса триграмм. Ингредиенты читаются из
+        основной базы: реплика может отставать от метки версии.
+        '''
+        entries = sorted(
+            (name.casefold(), pk, name, measurement_unit)
+            for pk, name, measurement_unit in Ingredient.objects.using(
+                DEFAULT_DB_ALIAS
+            ).values_list('id', 'name', 'measurement_unit')
+        )
+        keys = [key for key, *_ in entries]
+        rows = [
+            {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+            for _, pk, name, measurement_unit in entries
+        ]
+        postings, sizes = {}, []
+        for position, key in enumerate(keys):
+            key_trigrams = trigrams(key)
+            sizes.append(len(key_trigrams))
+            for trigram in key_trigrams:
+                postings.setdefault(trigram, []).append(position)
+        return keys, rows, postings, sizes
+
+    def _actualize(self):
+        '''Перестроение индекса при изменении версии ингредиентов.'''
+        version = get_version(INGREDIENTS_VERSION_KEY)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._index = self._build()
+                    self._version = version
+        return self._index
+
+    def startswith(self, prefix):
+        '''Поиск ингредиентов, название которых начинается с prefix.'''
+        keys, rows, *_ = self._actualize()
+        prefix = prefix.casefold()
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + chr(0x10FFFF), lo=start)
+        return sorted(rows[start:end], key=lambda row: row['id'])
+
+    def search(self, text, limit):
+        '''
+        Поиск ингредиентов: сначала совпадения по началу названия,
+        затем по подстроке, затем похожие по триграммам названия.
+        '''
+        keys, rows, postings, sizes = self._actualize()
+        text = text.casefold()
+        start = bisect_left(keys, text)
+        end = bisect_left(keys, text + chr(0x10FFFF), lo=start)
+        found = list(range(start, end))[:limit]
+        seen = set(found)
+        found.extend(
+            islice(
+                (
+                    position for position, key in enumerate(keys)
+                    if position not in seen and text in key
+                ),
+                limit - len(found)
+            )
+        )
+        seen.update(found)
+        query = trigrams(text)
+        shared = Counter(
+            position
+            for trigram in query
+            for position in postings.get(trigram, ())
+            if position not in seen
+        )
+        similar = sorted(
+            (
+                (count / (len(query) + sizes[position] - count), position)
+                for position, count in shared.items()
+            ),
+            key=lambda item: (-item[0], keys[item[1]])
+        )
+        found.extend(
+            position for similarity, position in similar
+            if similarity > settings.INGREDIENT_TRIGRAM_THRESHOLD
+        )
+        return [rows[position] for position in found[:limit]]
+
+
+ingredient_index = IngredientIndex()
+
+
+def create_search_structures(using):
+    """
+    Создание поисковых структур: в PostgreSQL - GIN-индексов по полю
+    search_vector рецептов и по триграммам названий ингредиентов,
+    в SQLite - виртуальной таблицы FTS5 для рецептов.
+    """
+    connection = connections[using]
+    recipes_table = Recipe._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {INGREDIENT_TRIGRAM_INDEX_NAME} '
+                f'ON {Ingredient._meta.db_table} '
+                'USING gin (UPPER(name) gin_trgm_ops)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {SEARCH_INDEX_NAME} '
+                f'ON {recipes_table} USING gin (search_vector)'
+            )
+            Recipe.objects.using(using).filter(
+                search_vector__isnull=True
+            ).update(search_vector=SEARCH_VECTOR)
+        elif connection.vendor == 'sqlite':
+            if SEARCH_TABLE in connection.introspection.table_names(cursor):
+                return
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(name, text)'
+            )
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, name, text) '
+                f'SELECT id, name, text FROM {recipes_table}'
+            )
+
+
+def update_recipe_search(recipe, using):
+    """Обновление поисковых данных рецепта."""
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        Recipe.objects.using(using).filter(pk=recipe.pk).update(
+            search_vector=SEARCH_VECTOR
+        )
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, name, text) '
+                'VALUES (%s, %s, %s)',
+                (recipe.pk, recipe.name, recipe.text)
+            )
+
+
+def delete_recipe_search(recipe, using):
+    """Удаление поисковых данных рецепта из таблицы FTS5 в SQLite."""
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', (recipe.pk,)
+            )
+
+
+def search_recipes(queryset, text):
+    """
+    Полнотекстовый поиск рецептов по названию и описанию
+    с сортировкой по релевантности (поле search_rank).
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        query = SearchQuery(
+            text, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        ).order_by('-search_rank')
+    tokens = SEARCH_TOKEN_REGEX.findall(text)
+    if vendor != 'sqlite' or not tokens:
+        return queryset.none()
+    match = ' '.join(f'"{token}"*' for token in tokens)
+    return queryset.filter(
+        pk__in=RawSQL(
+            f'SELECT rowid FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s',
+            (match,)
+        )
+    ).annotate(
+        search_rank=RawSQL(
+            f'SELECT -bm25({SEARCH_TABLE}, 10.0, 1.0) FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s '
+            f'AND rowid = {Recipe._meta.db_table}.id',
+            (match,)
+        )
+    ).order_by('-search_rank')
+
+
+def search_ingredients(text, limit):
+    """
+    Поиск ингредиентов с ранжированием: совпадения по началу названия,
+    по подстроке, затем похожие по триграммам. В PostgreSQL используется
+    pg_trgm, в остальных СУБД - индекс в памяти процесса.
+    """
+    if connections[Ingredient.objects.db].vendor != 'postgresql':
+        return ingredient_index.search(text, limit)
+    return list(
+        Ingredient.objects.annotate(
+            match_rank=Case(
+                When(name__istartswith=text, then=Value(0)),
+                When(name__icontains=text, then=Value(1)),
+                default=Value(2),
+                output_field=IntegerField()
+            ),
+            upper_name=Upper('name'),
+            similarity=TrigramSimilarity('upper_name', text.upper())
+        ).filter(
+            Q(name__icontains=text)
+            | Q(
+                upper_name__trigram_similar=text.upper(),
+                similarity__gt=settings.INGREDIENT_TRIGRAM_THRESHOLD
+            )
+        ).order_by(
+            'match_rank', '-similarity', 'name'
+        ).values('id', 'name', 'measurement_unit')[:limit]
+    )
@@ -0,0 +1,91 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from recipes.models import (Ingredient, IngredientToRecipe, Recipe, Tag,
+                            TagToRecipe)
+from recipes.search import delete_recipe_search, update_recipe_search
+from recipes.versions import (INGREDIENTS_VERSION_KEY, RECIPE_VERSION_KEY,
+                              TAGS_VERSION_KEY, bump_version, bump_versions)
+from users.models import CustomUser
+
+AUTHOR_FIELDS = {'email', 'username', 'first_name', 'last_name'}
+
+
+def bump_version_on_commit(key, using):
+    """
+    Смена метки версии сейчас и ещё раз после фиксации транзакции, чтобы
+    отбросить данные, закешированные параллельными запросами до её
+    завершения.
+    """
+    bump_version(key)
+    transaction.on_commit(lambda: bump_version(key), using=using)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredient_changed(sender, using, **kwargs):
+    """Смена версии ингредиентов при их создании, изменении или удалении."""
+    bump_version_on_commit(INGREDIENTS_VERSION_KEY, using)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tag_changed(sender, using, **kwargs):
+    """Смена версии тегов при их создании, изменении или удалении."""
+    bump_version_on_commit(TAGS_VERSION_KEY, using)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, using, update_fields, **kwargs):
+    """
+    Обновление поисковых данных после изменения названия или описания
+    и смена версии рецепта.
+    """
+    if update_fields is None or {'name', 'text'} & set(update_fields):
+        update_recipe_search(instance, using)
+    bump_version_on_commit(RECIPE_VERSION_KEY.format(instance.pk), using)
+
+
+@receiver(pre_save, sender=IngredientToRecipe)
+@receiver(pre_save, sender=TagToRecipe)
+def recipe_relation_moving(sender, instance, raw, using, **kwargs):
+    """Смена версии рецепта, от которого переносится ингредиент или тег."""
+    if raw or instance.pk is None:
+        return
+    recipe_id = sender.objects.using(using).filter(
+        pk=instance.pk
+    ).values_list('recipe_id', flat=True).first()
+    if recipe_id not in (None, instance.recipe_id):
+        bump_version_on_commit(RECIPE_VERSION_KEY.format(recipe_id), using)
+
+
+@receiver((post_save, post_delete), sender=IngredientToRecipe)
+@receiver((post_save, post_delete), sender=TagToRecipe)
+def recipe_relation_changed(sender, instance, using, **kwargs):
+    """
+    Смена версии рецепта при изменении его ингредиентов или тегов,
+    в том числе в админке.
+    """
+    bump_version_on_commit(
+        RECIPE_VERSION_KEY.format(instance.recipe_id), using
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, using, **kwargs):
+    """Удаление поисковых данных удалённого рецепта."""
+    delete_recipe_search(instance, using)
+
+
+@receiver(post_save, sender=CustomUser)
+def author_saved(sender, instance, created, update_fields, **kwargs):
+    """Смена версий рецептов автора после изменения его данных."""
+    if created or (
+        update_fields is not None and not AUTHOR_FIELDS & set(update_fields)
+    ):
+        return
+    bump_versions(
+        RECIPE_VERSION_KEY.format(pk)
+        for pk in Recipe.objects.filter(
+            author=instance
+        ).values_list('pk', flat=True)
+    )
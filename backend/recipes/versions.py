@@ -0,0 +1,47 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+
+
+INGREDIENTS_VERSION_KEY = 'ingredients_version'
+TAGS_VERSION_KEY = 'tags_version'
+RECIPE_VERSION_KEY = 'recipe_version:{}'
+
+
+def get_versions(keys):
+    """
+    Получение меток версий данных из общего кеша одним запросом.
+    Отсутствующие метки создаются.
+    """
+    versions = cache.get_many(keys)
+    for key in set(keys) - versions.keys():
+        cache.add(key, uuid4().hex, timeout=None)
+        versions[key] = cache.get(key)
+    return versions
+
+
+def get_version(key):
+    """
+    Получение метки версии данных из общего кеша.
+    Если метки ещё нет, она создаётся.
+    """
+    return get_versions((key,))[key]
+
+
+async def aget_version(key):
+    """Асинхронное получение метки версии данных из общего кеша."""
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, uuid4().hex, timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_version(key):
+    """Смена метки версии данных после их изменения."""
+    cache.set(key, uuid4().hex, timeout=None)
+
+
+def bump_versions(keys):
+    """Смена меток версий нескольких объектов одним запросом к кешу."""
+    cache.set_many({key: uuid4().hex for key in keys}, timeout=None)
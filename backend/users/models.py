@@ -33,6 +33,17 @@ class CustomUser(AbstractUser):
         max_length=max(len(role) for role, _ in ROLES),
         default=USER
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name=_('количество рецептов'),
+        default=0,
+        editable=False
+    )
+    subscribers_count = models.PositiveIntegerField(
+        verbose_name=_('количество подписчиков'),
+        default=0,
+        editable=False,
+        db_index=True
+    )
 
     class Meta(AbstractUser.Meta):
         ordering = ('username',)